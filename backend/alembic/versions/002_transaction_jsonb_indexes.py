@@ -0,0 +1,37 @@
+"""Add GIN indexes on transaction JSONB columns
+
+Revision ID: 002_transaction_jsonb_indexes
+Revises: 001_initial
+Create Date: 2025-01-06
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '002_transaction_jsonb_indexes'
+down_revision: Union[str, None] = '001_initial'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # jsonb_path_ops GIN indexes serve @> containment filters on the
+    # explanation factors and metadata without a sequential scan
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_explanation_gin "
+            "ON transactions USING GIN (explanation jsonb_path_ops)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_metadata_gin "
+            "ON transactions USING GIN (metadata jsonb_path_ops)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_metadata_gin")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_explanation_gin")
@@ -0,0 +1,37 @@
+"""Replace full fraud_score index with a partial high-score index
+
+Revision ID: 003_partial_fraud_score_index
+Revises: 002_transaction_jsonb_indexes
+Create Date: 2025-01-06
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '003_partial_fraud_score_index'
+down_revision: Union[str, None] = '002_transaction_jsonb_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Analytics only looks up medium/high scores; indexing just those rows
+    # keeps the index a fraction of the table size
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_fraud_score_high "
+            "ON transactions (fraud_score) WHERE fraud_score >= 0.5"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_fraud_score")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_fraud_score "
+            "ON transactions (fraud_score)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_fraud_score_high")
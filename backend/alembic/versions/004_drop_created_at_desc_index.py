@@ -0,0 +1,32 @@
+"""Drop duplicate descending created_at index on transactions
+
+Revision ID: 004_drop_created_at_desc_index
+Revises: 003_partial_fraud_score_index
+Create Date: 2025-01-06
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '004_drop_created_at_desc_index'
+down_revision: Union[str, None] = '003_partial_fraud_score_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ix_transactions_created_at already serves ORDER BY created_at DESC
+    # with a backward scan, so the DESC copy only costs an extra write
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_created_at_desc")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_created_at_desc "
+            "ON transactions (created_at DESC)"
+        )
@@ -0,0 +1,39 @@
+"""Add transactions_daily_rollup table for dashboard analytics
+
+Revision ID: 005_transactions_daily_rollup
+Revises: 004_drop_created_at_desc_index
+Create Date: 2025-01-07
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '005_transactions_daily_rollup'
+down_revision: Union[str, None] = '004_drop_created_at_desc_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # One row per day, kept current by the backend's rollup refresher
+    op.create_table(
+        'transactions_daily_rollup',
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('total_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_amount', sa.Numeric(precision=18, scale=2), nullable=False, server_default='0'),
+        sa.Column('risk_low', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('risk_medium', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('risk_high', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('risk_critical', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('approved', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rejected', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('under_review', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('transactions_daily_rollup')
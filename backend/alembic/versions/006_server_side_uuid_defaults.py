@@ -0,0 +1,30 @@
+"""Generate transaction, alert and pattern ids in the database
+
+Revision ID: 006_server_side_uuid_defaults
+Revises: 005_transactions_daily_rollup
+Create Date: 2025-01-08
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '006_server_side_uuid_defaults'
+down_revision: Union[str, None] = '005_transactions_daily_rollup'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('transactions', 'alerts', 'transaction_patterns')
+
+
+def upgrade() -> None:
+    # gen_random_uuid() is built in since PostgreSQL 13, no pgcrypto needed
+    for table in TABLES:
+        op.alter_column(table, 'id', server_default=sa.text('gen_random_uuid()'))
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.alter_column(table, 'id', server_default=None)
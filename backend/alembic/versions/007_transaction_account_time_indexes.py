@@ -0,0 +1,54 @@
+"""Add account/time composite and open high-risk partial indexes on transactions
+
+Revision ID: 007_transaction_account_time_indexes
+Revises: 006_server_side_uuid_defaults
+Create Date: 2025-01-08
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '007_transaction_account_time_indexes'
+down_revision: Union[str, None] = '006_server_side_uuid_defaults'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Pattern checks read an account's recent window; the composites make
+    # that a single range scan and make the account-only indexes redundant.
+    # The review queue only ever reads open high-risk rows, newest first.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_sender_time "
+            "ON transactions (sender_account, created_at)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_receiver_time "
+            "ON transactions (receiver_account, created_at)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_high_risk_open "
+            "ON transactions (created_at DESC) "
+            "WHERE risk_level IN ('high', 'critical') AND status IN ('pending', 'under_review')"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_transactions_sender_account")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_transactions_receiver_account")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_receiver_account "
+            "ON transactions (receiver_account)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_sender_account "
+            "ON transactions (sender_account)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_high_risk_open")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_receiver_time")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_sender_time")
@@ -0,0 +1,165 @@
+"""Range-partition transactions by month
+
+Revision ID: 008_partition_transactions
+Revises: 007_transaction_account_time_indexes
+Create Date: 2025-01-09
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '008_partition_transactions'
+down_revision: Union[str, None] = '007_transaction_account_time_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months of partitions kept ready ahead of the current one
+MONTHS_AHEAD = 3
+
+# Every index on transactions as of 007; a partitioned parent cannot build
+# indexes CONCURRENTLY, so they are created after the data is copied.
+# The transaction_id unique index must include the partition key, and the
+# account and review-queue indexes follow the time column the queries
+# filter on.
+INDEXES = (
+    "CREATE UNIQUE INDEX ix_transactions_transaction_id ON transactions (transaction_id, initiated_at)",
+    "CREATE INDEX ix_transactions_created_at ON transactions (created_at)",
+    "CREATE INDEX idx_transactions_fraud_score_high ON transactions (fraud_score) WHERE fraud_score >= 0.5",
+    "CREATE INDEX idx_transactions_explanation_gin ON transactions USING GIN (explanation jsonb_path_ops)",
+    "CREATE INDEX idx_transactions_metadata_gin ON transactions USING GIN (metadata jsonb_path_ops)",
+    "CREATE INDEX idx_transactions_sender_time ON transactions (sender_account, initiated_at)",
+    "CREATE INDEX idx_transactions_receiver_time ON transactions (receiver_account, initiated_at)",
+    "CREATE INDEX idx_transactions_high_risk_open ON transactions (initiated_at DESC) "
+    "WHERE risk_level IN ('high', 'critical') AND status IN ('pending', 'under_review')",
+)
+
+# The same indexes as 007 left them, restored on downgrade
+DOWNGRADE_INDEXES = tuple(
+    statement
+    .replace("(transaction_id, initiated_at)", "(transaction_id)")
+    .replace("initiated_at", "created_at")
+    for statement in INDEXES
+)
+
+# Creates the monthly partitions covering [from_month, to_month]; safe to
+# call repeatedly, e.g. from pg_cron, to keep partitions ahead of inserts
+CREATE_PARTITIONS_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_transaction_partitions(from_month date, to_month date)
+RETURNS void LANGUAGE plpgsql AS $$
+DECLARE
+    month date := date_trunc('month', from_month);
+BEGIN
+    WHILE month <= to_month LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF transactions FOR VALUES FROM (%L) TO (%L)',
+            'transactions_' || to_char(month, 'YYYY_MM'),
+            month,
+            month + interval '1 month'
+        );
+        month := month + interval '1 month';
+    END LOOP;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    # Unique keys on a partitioned table include the partition key, so
+    # alerts can no longer reference transactions.id with a foreign key
+    op.execute("ALTER TABLE alerts DROP CONSTRAINT IF EXISTS alerts_transaction_id_fkey")
+
+    op.execute("ALTER TABLE transactions RENAME TO transactions_unpartitioned")
+
+    # Time-windowed queries filter on initiated_at, which the 001 schema
+    # lacks; take it from created_at, or the migration time where that is
+    # NULL, so every row has a partition key and none is dropped
+    op.execute(
+        "ALTER TABLE transactions_unpartitioned "
+        "ADD COLUMN IF NOT EXISTS initiated_at timestamp with time zone DEFAULT now()"
+    )
+    op.execute(
+        "UPDATE transactions_unpartitioned "
+        "SET initiated_at = COALESCE(created_at, now()) WHERE initiated_at IS NULL"
+    )
+
+    op.execute(
+        "CREATE TABLE transactions "
+        "(LIKE transactions_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        "PARTITION BY RANGE (initiated_at)"
+    )
+    op.execute("ALTER TABLE transactions ALTER COLUMN initiated_at SET NOT NULL")
+    op.execute("ALTER TABLE transactions ADD PRIMARY KEY (id, initiated_at)")
+    op.execute(
+        "ALTER TABLE transactions ADD FOREIGN KEY (reviewed_by) "
+        "REFERENCES users (id) ON DELETE SET NULL"
+    )
+
+    op.execute(CREATE_PARTITIONS_FUNCTION)
+    op.execute(
+        "SELECT create_transaction_partitions("
+        "COALESCE((SELECT min(initiated_at) FROM transactions_unpartitioned), now())::date, "
+        f"(now() + interval '{MONTHS_AHEAD} months')::date)"
+    )
+    # Catches rows outside the prepared months instead of failing the insert
+    op.execute("CREATE TABLE transactions_default PARTITION OF transactions DEFAULT")
+
+    op.execute("INSERT INTO transactions SELECT * FROM transactions_unpartitioned")
+    op.execute("DROP TABLE transactions_unpartitioned")
+
+    for statement in INDEXES:
+        op.execute(statement)
+
+    # Keep next months' partitions created when pg_cron is available
+    op.execute(f"""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+                PERFORM cron.schedule(
+                    'create-transaction-partitions',
+                    '0 0 1 * *',
+                    'SELECT create_transaction_partitions(now()::date, '
+                    '(now() + interval ''{MONTHS_AHEAD} months'')::date)'
+                );
+            END IF;
+        END
+        $$
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_cron') THEN
+                PERFORM cron.unschedule('create-transaction-partitions');
+            END IF;
+        END
+        $$
+    """)
+
+    op.execute("ALTER TABLE transactions RENAME TO transactions_partitioned")
+    op.execute(
+        "CREATE TABLE transactions "
+        "(LIKE transactions_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    op.execute("ALTER TABLE transactions ALTER COLUMN initiated_at DROP NOT NULL")
+    op.execute("ALTER TABLE transactions ADD PRIMARY KEY (id)")
+    op.execute(
+        "ALTER TABLE transactions ADD FOREIGN KEY (reviewed_by) "
+        "REFERENCES users (id) ON DELETE SET NULL"
+    )
+    op.execute("INSERT INTO transactions SELECT * FROM transactions_partitioned")
+    op.execute("DROP TABLE transactions_partitioned")
+    op.execute("DROP FUNCTION IF EXISTS create_transaction_partitions(date, date)")
+
+    # initiated_at is kept; it may have existed before this revision
+    for statement in DOWNGRADE_INDEXES:
+        op.execute(statement)
+
+    op.execute(
+        "ALTER TABLE alerts ADD CONSTRAINT alerts_transaction_id_fkey "
+        "FOREIGN KEY (transaction_id) REFERENCES transactions (id) ON DELETE CASCADE"
+    )
@@ -0,0 +1,76 @@
+"""Store transaction JSON columns as JSONB and index fraud flags and ML features
+
+Revision ID: 009_jsonb_columns
+Revises: 008_partition_transactions
+Create Date: 2025-01-09
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '009_jsonb_columns'
+down_revision: Union[str, None] = '008_partition_transactions'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column) pairs the models declare as JSONB
+JSONB_COLUMNS = (
+    ('transactions', 'fraud_flags'),
+    ('transactions', 'metadata'),
+    ('transactions', 'ml_features'),
+    ('alerts', 'triggered_rules'),
+    ('alerts', 'evidence'),
+    ('transaction_patterns', 'typical_hours'),
+    ('transaction_patterns', 'typical_days'),
+    ('transaction_patterns', 'known_devices'),
+    ('transaction_patterns', 'known_ips'),
+    ('transaction_patterns', 'known_locations'),
+    ('transaction_patterns', 'frequent_receivers'),
+)
+
+# Containment lookups (fraud_flags @> '["velocity_spike"]'); a partitioned
+# parent cannot build indexes CONCURRENTLY
+GIN_COLUMNS = ('fraud_flags', 'ml_features')
+
+
+def upgrade() -> None:
+    # Columns already created as JSONB, or absent from this schema, are skipped
+    for table, column in JSONB_COLUMNS:
+        op.execute(f"""
+            DO $$
+            BEGIN
+                IF EXISTS (
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = '{table}' AND column_name = '{column}'
+                      AND data_type = 'json'
+                ) THEN
+                    ALTER TABLE {table}
+                        ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb;
+                END IF;
+            END
+            $$
+        """)
+
+    for column in GIN_COLUMNS:
+        op.execute(f"""
+            DO $$
+            BEGIN
+                IF EXISTS (
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'transactions' AND column_name = '{column}'
+                ) THEN
+                    CREATE INDEX IF NOT EXISTS idx_transactions_{column}_gin
+                        ON transactions USING GIN ({column} jsonb_path_ops);
+                END IF;
+            END
+            $$
+        """)
+
+
+def downgrade() -> None:
+    for column in reversed(GIN_COLUMNS):
+        op.execute(f"DROP INDEX IF EXISTS idx_transactions_{column}_gin")
+    # Column types are left as JSONB: which ones were JSON before is not recorded
@@ -0,0 +1,39 @@
+"""Store transaction amounts as integer paisa
+
+Revision ID: 010_amount_minor_units
+Revises: 009_jsonb_columns
+Create Date: 2025-01-10
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '010_amount_minor_units'
+down_revision: Union[str, None] = '009_jsonb_columns'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Fixed-width bigint instead of variable-length numeric; BDT has two
+    # decimal places, so every amount is a whole number of paisa
+    op.alter_column(
+        'transactions', 'amount',
+        type_=sa.BigInteger(),
+        existing_type=sa.Numeric(precision=15, scale=2),
+        existing_nullable=False,
+        postgresql_using='round(amount * 100)::bigint'
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        'transactions', 'amount',
+        type_=sa.Numeric(precision=15, scale=2),
+        existing_type=sa.BigInteger(),
+        existing_nullable=False,
+        postgresql_using='amount / 100.0'
+    )
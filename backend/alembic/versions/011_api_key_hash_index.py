@@ -0,0 +1,32 @@
+"""Enforce api_keys.key_hash uniqueness with a hash index
+
+Revision ID: 011_api_key_hash_index
+Revises: 010_amount_minor_units
+Create Date: 2025-01-10
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '011_api_key_hash_index'
+down_revision: Union[str, None] = '010_amount_minor_units'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Hash indexes cannot be UNIQUE, but an exclusion constraint on = backed
+    # by one enforces the same thing; key_hash is only ever matched exactly
+    op.execute(
+        "ALTER TABLE api_keys ADD CONSTRAINT excl_api_keys_key_hash "
+        "EXCLUDE USING hash (key_hash WITH =)"
+    )
+    op.execute("ALTER TABLE api_keys DROP CONSTRAINT IF EXISTS api_keys_key_hash_key")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE api_keys ADD CONSTRAINT api_keys_key_hash_key UNIQUE (key_hash)")
+    op.execute("ALTER TABLE api_keys DROP CONSTRAINT IF EXISTS excl_api_keys_key_hash")
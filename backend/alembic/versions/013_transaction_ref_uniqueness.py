@@ -0,0 +1,88 @@
+"""Enforce globally unique transaction refs on partitioned transactions
+
+Revision ID: 013_transaction_ref_uniqueness
+Revises: 012_audit_logs_user_time_index
+Create Date: 2025-01-12
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '013_transaction_ref_uniqueness'
+down_revision: Union[str, None] = '012_audit_logs_user_time_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The external reference is transaction_id in the migrated schema and
+# transaction_ref in the model schema
+REF_COLUMNS = ('transaction_ref', 'transaction_id')
+
+
+def upgrade() -> None:
+    # Since 008 the unique index on the ref includes initiated_at, so the same
+    # ref could be stored twice at different times. Each ref is now claimed
+    # in an unpartitioned table by a row trigger (which also fires for COPY);
+    # a duplicate fails the insert with a unique violation.
+    bind = op.get_bind()
+    columns = {c['name']: c for c in sa.inspect(bind).get_columns('transactions')}
+    ref_column = next(column for column in REF_COLUMNS if column in columns)
+    # Same type as the source column, so every stored ref fits
+    ref_type = columns[ref_column]['type'].compile(dialect=bind.dialect)
+
+    op.execute(
+        "CREATE TABLE IF NOT EXISTS transaction_refs "
+        f"(transaction_ref {ref_type} PRIMARY KEY)"
+    )
+    op.execute(
+        f"INSERT INTO transaction_refs (transaction_ref) "
+        f"SELECT DISTINCT {ref_column} FROM transactions "
+        "ON CONFLICT DO NOTHING"
+    )
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION claim_transaction_ref() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO transaction_refs (transaction_ref) VALUES (NEW.{ref_column});
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("DROP TRIGGER IF EXISTS trg_transactions_claim_ref ON transactions")
+    op.execute(
+        "CREATE TRIGGER trg_transactions_claim_ref AFTER INSERT ON transactions "
+        "FOR EACH ROW EXECUTE FUNCTION claim_transaction_ref()"
+    )
+
+    # Refs stay claimed after their transaction is deleted. Retention drops
+    # whole months through this function, which releases the partition's
+    # refs and drops it in one transaction:
+    #   SELECT drop_transaction_partition('transactions_2025_01');
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION drop_transaction_partition(partition_name text)
+        RETURNS void LANGUAGE plpgsql AS $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_inherits
+                WHERE inhrelid = partition_name::regclass
+                  AND inhparent = 'transactions'::regclass
+            ) THEN
+                RAISE EXCEPTION '% is not a partition of transactions', partition_name;
+            END IF;
+            EXECUTE format(
+                'DELETE FROM transaction_refs r USING %I t WHERE r.transaction_ref = t.{ref_column}',
+                partition_name
+            );
+            EXECUTE format('DROP TABLE %I', partition_name);
+        END
+        $$
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS drop_transaction_partition(text)")
+    op.execute("DROP TRIGGER IF EXISTS trg_transactions_claim_ref ON transactions")
+    op.execute("DROP FUNCTION IF EXISTS claim_transaction_ref()")
+    op.execute("DROP TABLE IF EXISTS transaction_refs")
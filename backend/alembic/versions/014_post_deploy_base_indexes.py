@@ -0,0 +1,64 @@
+"""Post-deploy: build or repair the initial indexes concurrently
+
+Revision ID: 014_post_deploy_base_indexes
+Revises: 013_transaction_ref_uniqueness
+Create Date: 2025-01-13
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '014_post_deploy_base_indexes'
+down_revision: Union[str, None] = '013_transaction_ref_uniqueness'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Indexes created by 001 that later revisions leave in place, as
+# (name, table, columns, unique). transactions is left out: its indexes
+# were rebuilt by 008, and a partitioned parent cannot be indexed
+# CONCURRENTLY.
+INDEXES = (
+    ('ix_users_email', 'users', 'email', True),
+    ('ix_audit_logs_created_at', 'audit_logs', 'created_at', False),
+    ('ix_alerts_created_at', 'alerts', 'created_at', False),
+    ('ix_transaction_patterns_account_id', 'transaction_patterns', 'account_id', False),
+    ('idx_alerts_status_created', 'alerts', 'status, created_at', False),
+    ('idx_audit_logs_user_action', 'audit_logs', 'user_id, action', False),
+)
+
+
+def upgrade() -> None:
+    # 001 builds these inside its transaction, which only ever ran against
+    # empty tables. This revision carries the non-blocking part: a missing
+    # index is built CONCURRENTLY, and one left INVALID by an interrupted
+    # concurrent build is rebuilt without locking out writes. On a database
+    # where 001 completed normally, both steps are no-ops.
+    invalid = {
+        row.relname
+        for row in op.get_bind().execute(
+            sa.text(
+                "SELECT c.relname FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE NOT i.indisvalid AND c.relname = ANY(:names)"
+            ),
+            {"names": [name for name, _, _, _ in INDEXES]}
+        )
+    }
+
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in INDEXES:
+            if name in invalid:
+                op.execute(f"REINDEX INDEX CONCURRENTLY {name}")
+            else:
+                op.execute(
+                    f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY IF NOT EXISTS "
+                    f"{name} ON {table} ({columns})"
+                )
+
+
+def downgrade() -> None:
+    # The indexes belong to 001; nothing to undo
+    pass
@@ -0,0 +1,115 @@
+"""
+Health Check Endpoints
+Liveness and readiness probes and Prometheus metrics, served as a bare
+Starlette app so probes and scrapes skip the API's middleware stack
+(see HealthProbeMiddleware).
+"""
+
+from collections import deque
+from typing import Deque, Tuple
+import asyncio
+import time
+from fastapi import status
+from fastapi.responses import ORJSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from app.core.audit_queue import audit_log_queue
+from app.core.config import settings
+from app.core.database import check_db_connection
+from app.core.logging import audit_logger
+from app.core.redis import check_redis_connection
+
+# (monotonic time, total log events dropped) samples, at most one per
+# second, taken when any caller probes readiness; the oldest one kept is
+# the last sample from before the current window
+_drop_samples: Deque[Tuple[float, int]] = deque([(time.monotonic(), 0)])
+
+
+def _log_drops_in_window() -> float:
+    """
+    Log events the bounded queues dropped per AUDIT_LOG_READY_WINDOW_SECONDS,
+    measured over at least one full window whoever probes and however often.
+    """
+    # Imported here: the middleware package imports this module
+    from app.middleware.audit import request_log_queue
+    
+    now = time.monotonic()
+    window = settings.AUDIT_LOG_READY_WINDOW_SECONDS
+    dropped = audit_log_queue.dropped + audit_logger.dropped + request_log_queue.dropped_events
+    
+    if now - _drop_samples[-1][0] >= 1:
+        _drop_samples.append((now, dropped))
+    while len(_drop_samples) > 1 and _drop_samples[1][0] <= now - window:
+        _drop_samples.popleft()
+    
+    since, baseline = _drop_samples[0]
+    return (dropped - baseline) * window / max(now - since, window)
+
+
+async def health_check(request: Request) -> ORJSONResponse:
+    """
+    Health check endpoint for load balancers and monitoring.
+    Returns service status and version information.
+    """
+    return ORJSONResponse({
+        "status": "healthy",
+        "service": "securepay-ai-backend",
+        "version": settings.VERSION,
+        "environment": settings.ENVIRONMENT
+    })
+
+
+async def readiness_check(request: Request) -> ORJSONResponse:
+    """
+    Readiness probe for Kubernetes.
+    Checks database and Redis connectivity, and that the log queues are
+    keeping up (not dropping more than AUDIT_LOG_READY_MAX_DROPS events
+    per AUDIT_LOG_READY_WINDOW_SECONDS).
+    """
+    db_status, redis_status = await asyncio.gather(
+        check_db_connection(),
+        check_redis_connection()
+    )
+    logging_status = _log_drops_in_window() <= settings.AUDIT_LOG_READY_MAX_DROPS
+    
+    is_ready = db_status and redis_status and logging_status
+    
+    return ORJSONResponse(
+        status_code=status.HTTP_200_OK if is_ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "status": "ready" if is_ready else "not_ready",
+            "checks": {
+                "database": "connected" if db_status else "disconnected",
+                "redis": "connected" if redis_status else "disconnected",
+                "audit_log": "ok" if logging_status else "dropping"
+            }
+        }
+    )
+
+
+async def liveness_check(request: Request) -> ORJSONResponse:
+    """
+    Liveness probe for Kubernetes.
+    Simple check to verify the application is running.
+    """
+    return ORJSONResponse({"status": "alive"})
+
+
+async def metrics(request: Request) -> Response:
+    """Prometheus metrics for this worker."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+health_app = Starlette(routes=[
+    Route("/health", health_check, methods=["GET"]),
+    Route("/health/ready", readiness_check, methods=["GET"]),
+    Route("/health/live", liveness_check, methods=["GET"]),
+    Route("/metrics", metrics, methods=["GET"]),
+])
+
+# Paths HealthProbeMiddleware hands to health_app
+HEALTH_PATHS = frozenset(route.path for route in health_app.routes)
@@ -4,10 +4,12 @@ Main router for API version 1 endpoints.
 """
 
 from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
 
 from app.api.v1.endpoints import auth, transactions, users, analytics, health
 
-router = APIRouter()
+# orjson serializes responses in C instead of json.dumps
+router = APIRouter(default_response_class=ORJSONResponse)
 
 # Include all endpoint routers
 router.include_router(
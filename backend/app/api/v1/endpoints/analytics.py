@@ -2,81 +2,91 @@
 
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, and_, or_, bindparam, union_all
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional
 
-from app.core.database import get_db
+from app.core.analytics_rollup import transaction_aggregates
+from app.core.database import get_db_ro
 from app.core.security import get_current_active_user
-from app.models.transaction import Transaction, RiskLevel, TransactionStatus
+from app.models.transaction import Transaction, TransactionDailyRollup as Rollup
 from app.schemas.transaction import TransactionStats, DailyStats, AnalyticsResponse
 
 router = APIRouter()
 
+# Length of each dashboard period, a rolling window ending now
+PERIOD_DAYS = {"day": 1, "week": 7, "month": 30}
+
+_AGGREGATES = transaction_aggregates()
+
+# Dashboard summary for a rolling window in one round trip: calendar days
+# wholly inside the window come from the daily rollup, and the partial
+# first day and today come from raw transactions, so the newest rows are
+# always counted
+_STATS_QUERY = union_all(
+    select(*(func.sum(getattr(Rollup, name)).label(name) for name in _AGGREGATES))
+    .where(Rollup.day >= bindparam("first_day"), Rollup.day <= bindparam("last_day")),
+    select(*(expr.label(name) for name, expr in _AGGREGATES.items()))
+    .where(or_(
+        and_(
+            Transaction.initiated_at >= bindparam("start"),
+            Transaction.initiated_at < bindparam("head_end")
+        ),
+        Transaction.initiated_at >= bindparam("today_start")
+    )),
+)
+
+
+def _window_params(period: str, now: datetime) -> Dict[str, Any]:
+    """
+    Split the window [now - period, now] into the raw-row head (start up to
+    the next midnight), the whole rollup days after it, and today.
+    """
+    start = now - timedelta(days=PERIOD_DAYS[period])
+    today = now.date()
+    first_day = start.date() + timedelta(days=1)
+    return {
+        "start": start,
+        "head_end": datetime.combine(first_day, datetime.min.time()),
+        "first_day": first_day,
+        "last_day": today - timedelta(days=1),
+        "today_start": datetime.combine(today, datetime.min.time()),
+    }
+
 
 @router.get("/dashboard", response_model=AnalyticsResponse)
 async def get_dashboard_analytics(
     period: str = Query("week", regex="^(day|week|month)$"),
     current_user: dict = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_ro)
 ):
-    """Get analytics dashboard data."""
-    
-    # Calculate date range
-    now = datetime.utcnow()
-    if period == "day":
-        start_date = now - timedelta(days=1)
-    elif period == "week":
-        start_date = now - timedelta(days=7)
-    else:  # month
-        start_date = now - timedelta(days=30)
-    
-    # Overall statistics
-    stats_query = select(
-        func.count(Transaction.id).label("total"),
-        func.sum(Transaction.amount).label("total_amount"),
-        func.avg(Transaction.amount).label("avg_amount"),
-    ).where(Transaction.initiated_at >= start_date)
-    
-    stats_result = await db.execute(stats_query)
-    stats_row = stats_result.first()
+    """
+    Get analytics dashboard data for the last 24 hours, 7 days or 30 days.
+
+    Whole days inside the window are read from the daily rollup, which is
+    refreshed every ANALYTICS_ROLLUP_INTERVAL seconds. Rows inserted later
+    with an initiated_at on an earlier day show up after the next refresh.
+    """
     
-    # Risk level counts
-    risk_counts = {}
-    for risk_level in [RiskLevel.LOW, RiskLevel.MEDIUM, RiskLevel.HIGH, RiskLevel.CRITICAL]:
-        count_result = await db.execute(
-            select(func.count())
-            .select_from(Transaction)
-            .where(and_(
-                Transaction.initiated_at >= start_date,
-                Transaction.risk_level == risk_level
-            ))
-        )
-        risk_counts[risk_level.value] = count_result.scalar()
+    result = await db.execute(_STATS_QUERY, _window_params(period, datetime.utcnow()))
+    totals = {name: 0 for name in _AGGREGATES}
+    for row in result:
+        for name, value in row._mapping.items():
+            totals[name] += value or 0
     
-    # Decision counts
-    decision_counts = {}
-    for status in [TransactionStatus.APPROVED, TransactionStatus.REJECTED, TransactionStatus.UNDER_REVIEW]:
-        count_result = await db.execute(
-            select(func.count())
-            .select_from(Transaction)
-            .where(and_(
-                Transaction.initiated_at >= start_date,
-                Transaction.status == status
-            ))
-        )
-        decision_counts[status.value] = count_result.scalar()
+    total = totals["total_count"]
+    total_amount = float(totals["total_amount"])
     
     summary = TransactionStats(
-        total_transactions=stats_row.total or 0,
-        total_amount=float(stats_row.total_amount or 0),
-        avg_amount=float(stats_row.avg_amount or 0),
-        high_risk_count=risk_counts.get("high", 0) + risk_counts.get("critical", 0),
-        medium_risk_count=risk_counts.get("medium", 0),
-        low_risk_count=risk_counts.get("low", 0),
-        approved_count=decision_counts.get("approved", 0),
-        rejected_count=decision_counts.get("rejected", 0),
-        review_count=decision_counts.get("under_review", 0)
+        total_transactions=total,
+        total_amount=total_amount,
+        avg_amount=total_amount / total if total else 0.0,
+        high_risk_count=totals["risk_high"] + totals["risk_critical"],
+        medium_risk_count=totals["risk_medium"],
+        low_risk_count=totals["risk_low"],
+        approved_count=totals["approved"],
+        rejected_count=totals["rejected"],
+        review_count=totals["under_review"]
     )
     
     return AnalyticsResponse(
@@ -6,14 +6,16 @@ Handles user registration, login, MFA, and token management.
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, case, or_
+import asyncio
 import secrets
 import structlog
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.security import (
     PasswordService, JWTService, MFAService,
-    get_current_user, encryption_service
+    get_current_user, encryption_service, DUMMY_PASSWORD_HASH
 )
 from app.core.logging import audit_logger
 from app.core.redis import session_store
@@ -42,14 +44,19 @@ async def register(
     - **last_name**: User's last name
     - **phone**: Bangladesh phone number (optional)
     """
+    now = datetime.utcnow()
+    
+    # Check if email or phone number is already registered in one round trip
+    conflict = User.email == user_data.email
+    if user_data.phone:
+        conflict = or_(conflict, User.phone == user_data.phone)
     
-    # Check if user already exists
     result = await db.execute(
-        select(User).where(User.email == user_data.email)
+        select(User.email, User.phone).where(conflict).limit(2)
     )
-    existing_user = result.scalar_one_or_none()
+    existing = result.all()
     
-    if existing_user:
+    if any(row.email == user_data.email for row in existing):
         audit_logger.log_authentication(
             user_id=user_data.email,
             success=False,
@@ -62,21 +69,16 @@ async def register(
             detail="Email already registered"
         )
     
-    # Check phone number if provided
-    if user_data.phone:
-        result = await db.execute(
-            select(User).where(User.phone == user_data.phone)
+    if existing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Phone number already registered"
         )
-        existing_phone = result.scalar_one_or_none()
-        
-        if existing_phone:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Phone number already registered"
-            )
     
-    # Hash password
-    hashed_password = PasswordService.hash_password(user_data.password)
+    # Hash password (Argon2 is CPU-bound, keep it off the event loop)
+    hashed_password = await asyncio.to_thread(
+        PasswordService.hash_password, user_data.password
+    )
     
     # Create new user
     new_user = User(
@@ -89,7 +91,7 @@ async def register(
         department=user_data.department,
         job_title=user_data.job_title,
         status=UserStatus.ACTIVE,  # Auto-activate for demo; use PENDING in production
-        password_changed_at=datetime.utcnow()
+        password_changed_at=now
     )
     
     db.add(new_user)
@@ -112,13 +114,13 @@ async def register(
             "user_id": str(new_user.id),
             "email": new_user.email,
             "role": new_user.role.value,
-            "created_at": datetime.utcnow().isoformat()
+            "created_at": now.isoformat()
         }
     )
     
     # Update user session
     new_user.current_session_id = session_id
-    new_user.last_login = datetime.utcnow()
+    new_user.last_login = now
     await db.commit()
     
     # Audit log
@@ -139,7 +141,7 @@ async def register(
     return TokenResponse(
         access_token=access_token,
         refresh_token=refresh_token,
-        expires_in=JWTService.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        expires_in=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60,
         mfa_required=False
     )
 
@@ -154,6 +156,7 @@ async def login(
     Login with email and password.
     Returns access and refresh tokens.
     """
+    now = datetime.utcnow()
     
     # Find user
     result = await db.execute(
@@ -162,6 +165,11 @@ async def login(
     user = result.scalar_one_or_none()
     
     if not user:
+        # Verify against a dummy hash so unknown emails take as long as wrong
+        # passwords and can't be enumerated by timing
+        await asyncio.to_thread(
+            PasswordService.verify_password, credentials.password, DUMMY_PASSWORD_HASH
+        )
         audit_logger.log_authentication(
             user_id=credentials.email,
             success=False,
@@ -188,23 +196,39 @@ async def login(
             detail=f"Account locked until {user.locked_until}"
         )
     
-    # Verify password
-    if not PasswordService.verify_password(credentials.password, user.hashed_password):
-        # Increment failed attempts
-        user.failed_login_attempts += 1
-        user.last_failed_login = datetime.utcnow()
+    # Verify password (Argon2 is CPU-bound, keep it off the event loop)
+    password_valid = await asyncio.to_thread(
+        PasswordService.verify_password, credentials.password, user.hashed_password
+    )
+    if not password_valid:
+        # Increment failed attempts and lock the account after 5 failures in a
+        # single UPDATE ... RETURNING instead of a read-modify-write
+        result = await db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(
+                failed_login_attempts=User.failed_login_attempts + 1,
+                last_failed_login=now,
+                locked_until=case(
+                    (
+                        User.failed_login_attempts + 1 >= 5,
+                        now + timedelta(minutes=30)
+                    ),
+                    else_=User.locked_until
+                )
+            )
+            .returning(User.failed_login_attempts)
+        )
+        failed_login_attempts = result.scalar_one()
+        await db.commit()
         
-        # Lock account after 5 failed attempts
-        if user.failed_login_attempts >= 5:
-            user.locked_until = datetime.utcnow() + timedelta(minutes=30)
+        if failed_login_attempts >= 5:
             logger.warning(
                 "Account locked due to failed login attempts",
                 user_id=str(user.id),
                 email=user.email
             )
         
-        await db.commit()
-        
         audit_logger.log_authentication(
             user_id=str(user.id),
             success=False,
@@ -282,14 +306,14 @@ async def login(
             "user_id": str(user.id),
             "email": user.email,
             "role": user.role.value,
-            "created_at": datetime.utcnow().isoformat()
+            "created_at": now.isoformat()
         }
     )
     
     # Update user
     user.current_session_id = session_id
-    user.last_login = datetime.utcnow()
-    user.last_activity = datetime.utcnow()
+    user.last_login = now
+    user.last_activity = now
     await db.commit()
     
     # Audit log
@@ -310,7 +334,7 @@ async def login(
     return TokenResponse(
         access_token=access_token,
         refresh_token=refresh_token,
-        expires_in=30 * 60,  # 30 minutes
+        expires_in=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60,
         mfa_required=False
     )
 
@@ -336,13 +360,23 @@ async def refresh_token(
         
         user_id = payload.get("sub")
         
-        # Get user
-        result = await db.execute(
-            select(User).where(User.id == user_id)
-        )
-        user = result.scalar_one_or_none()
+        # Get user, from the short-lived cache when possible
+        cached_user = await session_store.get_user_cache(user_id)
+        if cached_user is None:
+            result = await db.execute(
+                select(User).where(User.id == user_id)
+            )
+            user = result.scalar_one_or_none()
+            
+            if user:
+                cached_user = {
+                    "status": user.status.value,
+                    "role": user.role.value,
+                    "email": user.email
+                }
+                await session_store.set_user_cache(user_id, cached_user)
         
-        if not user or user.status != UserStatus.ACTIVE:
+        if not cached_user or cached_user["status"] != UserStatus.ACTIVE.value:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not found or inactive"
@@ -351,19 +385,19 @@ async def refresh_token(
         # Create new access token
         access_token = JWTService.create_access_token(
             data={
-                "sub": str(user.id),
-                "email": user.email,
-                "role": user.role.value,
-                "roles": [user.role.value]
+                "sub": user_id,
+                "email": cached_user["email"],
+                "role": cached_user["role"],
+                "roles": [cached_user["role"]]
             }
         )
         
-        logger.info("Token refreshed", user_id=str(user.id))
+        logger.info("Token refreshed", user_id=user_id)
         
         return TokenResponse(
             access_token=access_token,
             refresh_token=token_request.refresh_token,
-            expires_in=30 * 60
+            expires_in=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60
         )
         
     except HTTPException:
@@ -401,6 +435,8 @@ async def logout(
         user.current_session_id = None
         await db.commit()
     
+    await session_store.delete_user_cache(user_id)
+    
     audit_logger.log_authentication(
         user_id=user_id,
         success=True,
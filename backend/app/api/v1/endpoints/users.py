@@ -2,24 +2,37 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
+from sqlalchemy import select, func, desc, bindparam
 from uuid import UUID
 
-from app.core.database import get_db
+from app.core.database import get_db, get_db_ro
+from app.core.logging import audit_logger
+from app.core.redis import session_store
 from app.core.security import get_current_active_user, require_roles
-from app.models.user import User, UserRole
-from app.schemas.user import UserResponse, UserProfile, UserUpdate, UserListResponse
+from app.models.user import User, UserRole, UserStatus
+from app.schemas.user import (
+    UserResponse, UserProfile, UserUpdate, UserAdminUpdate, UserListResponse
+)
 
 router = APIRouter()
 
+# Point lookup built once at import; only the bound id changes per request
+_GET_USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+
+# Only the columns UserResponse needs, so listing skips full ORM rows
+_LIST_COLUMNS = tuple(getattr(User, name) for name in UserResponse.model_fields)
+
+# Fields token refresh reads from the cached user entry
+_USER_CACHE_FIELDS = frozenset({"status", "role"})
+
 
 @router.get("/me", response_model=UserProfile)
 async def get_current_user_profile(
     current_user: dict = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_ro)
 ):
     """Get current user's profile."""
-    result = await db.execute(select(User).where(User.id == current_user["sub"]))
+    result = await db.execute(_GET_USER_BY_ID, {"user_id": current_user["sub"]})
     user = result.scalar_one_or_none()
     
     if not user:
@@ -49,7 +62,7 @@ async def update_current_user(
     db: AsyncSession = Depends(get_db)
 ):
     """Update current user's profile."""
-    result = await db.execute(select(User).where(User.id == current_user["sub"]))
+    result = await db.execute(_GET_USER_BY_ID, {"user_id": current_user["sub"]})
     user = result.scalar_one_or_none()
     
     if not user:
@@ -70,24 +83,72 @@ async def list_users(
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
     current_user: dict = Depends(require_roles("admin")),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_ro)
 ):
     """List all users (admin only)."""
     count_result = await db.execute(select(func.count()).select_from(User))
     total = count_result.scalar()
     
     result = await db.execute(
-        select(User)
+        select(*_LIST_COLUMNS)
         .order_by(desc(User.created_at))
         .offset((page - 1) * page_size)
         .limit(page_size)
     )
-    users = result.scalars().all()
     
     return UserListResponse(
-        users=[UserResponse.from_orm(u) for u in users],
+        users=[UserResponse.model_construct(**row._mapping) for row in result],
         total=total,
         page=page,
         page_size=page_size,
         total_pages=(total + page_size - 1) // page_size
     )
+
+
+@router.patch("/{user_id}", response_model=UserResponse)
+async def update_user(
+    user_id: UUID,
+    user_update: UserAdminUpdate,
+    current_user: dict = Depends(require_roles("admin")),
+    db: AsyncSession = Depends(get_db)
+):
+    """Update a user's role, status or account flags (admin only)."""
+    result = await db.execute(_GET_USER_BY_ID, {"user_id": user_id})
+    user = result.scalar_one_or_none()
+    
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    
+    changes = user_update.model_dump(exclude_unset=True, exclude_none=True)
+    try:
+        if "role" in changes:
+            changes["role"] = UserRole(changes["role"])
+        if "status" in changes:
+            changes["status"] = UserStatus(changes["status"])
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    
+    for field, value in changes.items():
+        setattr(user, field, value)
+    
+    await db.commit()
+    
+    # Token refresh serves status and role from a short-lived cache; drop it
+    # so a suspended or demoted user cannot keep minting tokens from it
+    if changes.keys() & _USER_CACHE_FIELDS:
+        await session_store.delete_user_cache(str(user_id))
+    
+    audit_logger.log_security_event(
+        event_name="user_updated",
+        severity="medium",
+        user_id=current_user.get("sub"),
+        details={
+            "target_user_id": str(user_id),
+            "changes": {
+                field: value.value if isinstance(value, (UserRole, UserStatus)) else value
+                for field, value in changes.items()
+            }
+        }
+    )
+    
+    return UserResponse.model_validate(user)
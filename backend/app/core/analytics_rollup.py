@@ -0,0 +1,133 @@
+"""
+Analytics Rollup
+Keeps transactions_daily_rollup up to date so the dashboard reads a handful
+of per-day rows instead of aggregating raw transactions.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+import asyncio
+import structlog
+from sqlalchemy import select, func, bindparam
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.transaction import (
+    Transaction, TransactionDailyRollup, TransactionStatus, RiskLevel
+)
+
+logger = structlog.get_logger(__name__)
+
+# Decision statuses reported on the dashboard
+DECISION_STATUSES = (
+    TransactionStatus.APPROVED,
+    TransactionStatus.REJECTED,
+    TransactionStatus.UNDER_REVIEW,
+)
+
+
+def transaction_aggregates() -> Dict[str, Any]:
+    """
+    Aggregates over raw transactions keyed by rollup column name; the
+    dashboard applies the same expressions to the part of its window the
+    rollup does not cover.
+    """
+    return {
+        "total_count": func.count(Transaction.id),
+        "total_amount": func.coalesce(func.sum(Transaction.amount), 0) / 100,
+        **{
+            f"risk_{risk_level.value}": func.count().filter(Transaction.risk_level == risk_level)
+            for risk_level in RiskLevel
+        },
+        **{
+            decision_status.value: func.count().filter(Transaction.status == decision_status)
+            for decision_status in DECISION_STATUSES
+        },
+    }
+
+
+def _build_refresh_statement():
+    """
+    INSERT ... SELECT ... ON CONFLICT (day) DO UPDATE recomputing every day
+    since the :since bind parameter from the raw transactions table.
+    """
+    day = func.date(Transaction.initiated_at)
+    columns = {
+        "day": day,
+        **transaction_aggregates(),
+        "refreshed_at": func.now(),
+    }
+
+    source = (
+        select(*columns.values())
+        .where(Transaction.initiated_at >= bindparam("since"))
+        .group_by(day)
+    )
+    stmt = insert(TransactionDailyRollup).from_select(list(columns), source)
+    return stmt.on_conflict_do_update(
+        index_elements=[TransactionDailyRollup.day],
+        set_={name: stmt.excluded[name] for name in columns if name != "day"}
+    )
+
+
+_REFRESH_STMT = _build_refresh_statement()
+
+
+class DailyRollupRefresher:
+    """Background task that periodically recomputes the trailing days of the rollup."""
+
+    def __init__(
+        self,
+        interval: int = settings.ANALYTICS_ROLLUP_INTERVAL,
+        days: int = settings.ANALYTICS_ROLLUP_DAYS
+    ):
+        self.interval = interval
+        self.days = days
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """Check if the refresh task is running."""
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Start the background refresh task."""
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info("Analytics rollup refresher started", interval=self.interval)
+
+    async def stop(self) -> None:
+        """Stop the background refresh task."""
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Analytics rollup refresher stopped")
+
+    async def refresh(self) -> None:
+        """Recompute the rollup rows for the trailing days."""
+        since = datetime.combine(
+            datetime.utcnow().date() - timedelta(days=self.days - 1),
+            datetime.min.time()
+        )
+        async with engine.begin() as conn:
+            await conn.execute(_REFRESH_STMT, {"since": since})
+
+    async def _run(self) -> None:
+        """Refresh, then sleep for the interval, until cancelled."""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("Analytics rollup refresh failed", error=str(e))
+            await asyncio.sleep(self.interval)
+
+
+# Global rollup refresher instance
+daily_rollup_refresher = DailyRollupRefresher()
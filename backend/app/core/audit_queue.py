@@ -0,0 +1,168 @@
+"""
+Audit Log Queue
+Buffers audit log rows in memory and writes them to the audit_logs table
+in batches with PostgreSQL COPY, off the request path.
+"""
+
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+import asyncio
+import json
+import uuid
+import structlog
+
+from app.core.config import settings
+from app.core.ids import uuid7
+from app.core.metrics import LOG_QUEUE_DEPTH, LOG_QUEUE_DROPS
+
+logger = structlog.get_logger(__name__)
+
+
+class AuditLogQueue:
+    """
+    Bounded deque drained by a background task.
+
+    Producers call put() from the request path; the consumer collects up to
+    batch_size rows or waits at most flush_interval seconds, then writes the
+    whole batch with a single COPY. When full, the oldest row is dropped
+    and counted in audit_log_drops_total.
+    """
+
+    COLUMNS = (
+        "id", "user_id", "event_type", "event_name", "resource_type",
+        "resource_id", "action", "ip_address", "user_agent", "request_id",
+        "details", "success", "error_message", "created_at"
+    )
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.05
+    ):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._buffer: Deque[tuple] = deque(maxlen=max_size)
+        self._ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._drops = LOG_QUEUE_DROPS.labels(queue="audit_db")
+        LOG_QUEUE_DEPTH.labels(queue="audit_db").set_function(lambda: len(self._buffer))
+
+    @property
+    def running(self) -> bool:
+        """Check if the consumer task is running."""
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Start the background consumer."""
+        if not settings.AUDIT_LOG_ENABLED or self.running:
+            return
+        self._ready = asyncio.Event()
+        self._task = asyncio.create_task(self._consume())
+        logger.info("Audit log queue started")
+
+    async def stop(self) -> None:
+        """Stop the consumer and write any rows still queued."""
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        batch = list(self._buffer)
+        self._buffer.clear()
+        if batch:
+            await self._write(batch)
+        logger.info("Audit log queue stopped", dropped=self.dropped)
+
+    def put(
+        self,
+        event_type: str,
+        event_name: str,
+        user_id: Optional[str] = None,
+        resource_type: Optional[str] = None,
+        resource_id: Optional[str] = None,
+        action: Optional[str] = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        request_id: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None,
+        success: bool = True,
+        error_message: Optional[str] = None
+    ) -> bool:
+        """
+        Queue an audit log row. Never blocks; drops the oldest row if the
+        queue is full. Returns True if the row was queued.
+        """
+        if not self.running:
+            return False
+
+        details = dict(details or {})
+        user_uuid = None
+        if user_id:
+            try:
+                user_uuid = uuid.UUID(str(user_id))
+            except ValueError:
+                # Failed logins are keyed by the submitted email
+                details["identifier"] = user_id
+
+        record = (
+            uuid7(), user_uuid, event_type, event_name, resource_type,
+            resource_id, action, ip_address, user_agent, request_id,
+            json.dumps(details), success, error_message, datetime.utcnow()
+        )
+
+        if len(self._buffer) == self.max_size:
+            self.dropped += 1
+            self._drops.inc()
+            if self.dropped % 1000 == 1:
+                logger.warning("Audit log queue full, dropping rows", dropped=self.dropped)
+        self._buffer.append(record)
+        self._ready.set()
+        return True
+
+    async def _consume(self) -> None:
+        """Collect rows into batches and write them."""
+        buffer = self._buffer
+        while True:
+            await self._ready.wait()
+            if len(buffer) < self.batch_size:
+                await asyncio.sleep(self.flush_interval)
+
+            batch = [buffer.popleft() for _ in range(min(len(buffer), self.batch_size))]
+            if not buffer:
+                self._ready.clear()
+
+            try:
+                await self._write(batch)
+            except asyncio.CancelledError:
+                # Put the batch back so stop() writes it
+                buffer.extendleft(reversed(batch))
+                raise
+
+    async def _write(self, batch: List[tuple]) -> None:
+        """Write a batch of rows with a single COPY."""
+        from app.core.database import engine
+
+        try:
+            async with engine.connect() as conn:
+                raw_conn = await conn.get_raw_connection()
+                await raw_conn.driver_connection.copy_records_to_table(
+                    "audit_logs",
+                    records=batch,
+                    columns=self.COLUMNS
+                )
+        except Exception as e:
+            # The rows are lost from the table only; audit_logger emits every
+            # queued event to the structured audit log as well
+            logger.error("Audit log batch write failed", rows=len(batch), error=str(e))
+
+
+# Global audit log queue instance
+audit_log_queue = AuditLogQueue()
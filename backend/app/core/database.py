@@ -3,9 +3,12 @@ Database Configuration and Session Management
 Async SQLAlchemy setup with connection pooling and health checks.
 """
 
+from typing import Dict, Iterable, List, Sequence, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import text
+from sqlalchemy import text, inspect, JSON
+import enum
+import json
 import structlog
 
 from app.core.config import settings
@@ -17,9 +20,27 @@ engine = create_async_engine(
     settings.DATABASE_URL,
     pool_size=settings.DATABASE_POOL_SIZE,
     max_overflow=settings.DATABASE_MAX_OVERFLOW,
-    pool_pre_ping=True,  # Enable connection health checks
+    pool_pre_ping=False,  # Skip the extra ping round trip on every checkout
+    pool_use_lifo=True,  # Reuse the most recently returned (warm) connection
     pool_recycle=300,  # Recycle connections every 5 minutes
-    echo=settings.DEBUG  # Log SQL queries in debug mode
+    pool_reset_on_return="rollback",  # Clean up on checkin instead of pinging on checkout
+    echo=settings.DEBUG,  # Log SQL queries in debug mode
+    connect_args={
+        # Keep prepared statements per connection so hot queries skip parse/plan
+        "statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE,
+        "server_settings": {
+            # Short OLTP queries never recoup LLVM JIT compile time
+            "jit": "off",
+            # now() server defaults fill naive UTC timestamp columns
+            "timezone": "UTC",
+            "application_name": "securepay-api",
+            # Let the server notice dead peers instead of pre-pinging
+            "tcp_keepalives_idle": "60",
+            "tcp_keepalives_interval": "10",
+            "tcp_keepalives_count": "3",
+        },
+    }
 )
 
 # Create async session factory
@@ -31,6 +52,16 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False
 )
 
+# Read-only session factory on the same pool; transactions begin as
+# BEGIN READ ONLY so Postgres can skip write bookkeeping
+ReadOnlySessionLocal = async_sessionmaker(
+    engine.execution_options(postgresql_readonly=True),
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False
+)
+
 # Base class for ORM models
 Base = declarative_base()
 
@@ -72,20 +103,113 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+async def get_db_ro() -> AsyncSession:
+    """
+    Dependency for read-only endpoints.
+    Yields a read-only session and never issues a COMMIT; the open
+    transaction is simply released with the connection.
+    """
+    async with ReadOnlySessionLocal() as session:
+        yield session
+
+
 async def check_db_connection() -> bool:
     """
     Check database connectivity.
     Returns True if connected, False otherwise.
+    Uses a pooled connection directly, without an ORM session; a connection
+    found dead is invalidated by the pool.
     """
     try:
-        async with AsyncSessionLocal() as session:
-            await session.execute(text("SELECT 1"))
+        async with engine.connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
             return True
     except Exception as e:
         logger.error("Database connection check failed", error=str(e))
         return False
 
 
+async def bulk_insert_transactions(
+    records: Iterable[Sequence],
+    columns: Sequence[str],
+    synchronous_commit: bool = True
+) -> int:
+    """
+    Bulk-load transaction rows with PostgreSQL COPY.
+
+    records are tuples in the same order as columns, holding the values as
+    stored (enum columns take the member name). Pass synchronous_commit=False
+    for non-critical loads to skip waiting on the WAL flush for this
+    transaction only.
+    Returns the number of rows copied.
+    """
+    records = list(records)
+    if not records:
+        return 0
+
+    async with engine.begin() as conn:
+        if not synchronous_commit:
+            await conn.execute(text("SET LOCAL synchronous_commit = off"))
+        raw_conn = await conn.get_raw_connection()
+        await raw_conn.driver_connection.copy_records_to_table(
+            "transactions",
+            records=records,
+            columns=list(columns)
+        )
+
+    logger.info("Bulk inserted transactions", rows=len(records))
+    return len(records)
+
+
+async def bulk_copy(session: AsyncSession, model, objects: List) -> None:
+    """
+    Write ORM objects with COPY on the session's connection and transaction.
+
+    Bypasses the unit of work, so Python-side column defaults are applied to
+    the objects here and the objects are never added to the session. COPY
+    has no DEFAULT keyword, so a column left as None that has a server
+    default is omitted from the copy instead; objects are grouped by the
+    columns they omit, one COPY per group. Server-generated values are not
+    read back onto the objects.
+    """
+    if not objects:
+        return
+
+    column_attrs = inspect(model).column_attrs
+    columns = [attr.columns[0] for attr in column_attrs]
+
+    groups: Dict[Tuple[int, ...], List[tuple]] = {}
+    for obj in objects:
+        record = []
+        omitted = []
+        for i, (attr, column) in enumerate(zip(column_attrs, columns)):
+            value = getattr(obj, attr.key)
+            if value is None and column.default is not None:
+                default = column.default
+                value = default.arg(None) if default.is_callable else default.arg
+                setattr(obj, attr.key, value)
+            if value is None and column.server_default is not None:
+                omitted.append(i)
+                continue
+            if isinstance(value, enum.Enum):
+                value = value.name  # SQLAlchemy stores enum member names
+            elif value is not None and isinstance(column.type, JSON):
+                value = json.dumps(value)
+            record.append(value)
+        groups.setdefault(tuple(omitted), []).append(tuple(record))
+
+    conn = await session.connection()
+    raw_conn = await conn.get_raw_connection()
+    for omitted, records in groups.items():
+        await raw_conn.driver_connection.copy_records_to_table(
+            model.__tablename__,
+            records=records,
+            columns=[
+                column.name for i, column in enumerate(columns) if i not in omitted
+            ]
+        )
+
+
 class DatabaseSession:
     """
     Context manager for database sessions.
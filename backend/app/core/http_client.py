@@ -0,0 +1,31 @@
+"""
+HTTP Client
+Shared httpx client for calls to the ML service, so connections are pooled
+and kept alive across requests instead of reconnecting per call.
+"""
+
+import httpx
+
+from app.core.config import settings
+
+# Request bodies are pre-serialized (pydantic/orjson) and sent as content=
+JSON_HEADERS = {"content-type": "application/json"}
+
+# HTTP/2 multiplexes concurrent requests as streams over one connection when
+# the ML service is reached over TLS (ALPN); plain http:// stays on HTTP/1.1,
+# so the pool limits still size for that case
+ml_client = httpx.AsyncClient(
+    base_url=settings.ML_SERVICE_URL,
+    http2=True,
+    timeout=settings.ML_SERVICE_TIMEOUT,
+    limits=httpx.Limits(
+        max_connections=100,
+        max_keepalive_connections=50,
+        keepalive_expiry=30
+    )
+)
+
+
+async def close_http_clients() -> None:
+    """Close shared HTTP clients and their pooled connections."""
+    await ml_client.aclose()
@@ -0,0 +1,28 @@
+"""
+ID Generation
+Time-ordered UUIDs for primary keys.
+"""
+
+import os
+import time
+import uuid
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Generate a UUIDv7 (RFC 9562): 48-bit Unix millisecond timestamp,
+    version 7, 12 random bits, variant 10, 62 random bits.
+
+    Successive ids sort by creation time, so inserts land on the rightmost
+    B-tree leaf instead of a random page.
+    """
+    ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (
+        (ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76
+        | ((rand >> 62) & 0xFFF) << 64
+        | 0b10 << 62
+        | rand & 0x3FFF_FFFF_FFFF_FFFF
+    )
+    return uuid.UUID(int=value)
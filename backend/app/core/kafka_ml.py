@@ -0,0 +1,148 @@
+"""
+Kafka ML Client
+Alternative to the HTTP hop for fraud predictions: transactions are published
+to Kafka and the ML service replies over Redis pub/sub, which lets the ML side
+micro-batch inference across requests. When no usable reply arrives in
+time, analyze falls back to the HTTP call.
+
+Message contract:
+    request  (KAFKA_TOPIC_TRANSACTIONS): {"corr_id", "reply_to", "transaction"}
+    reply    (Redis channel reply_to):   {"corr_id", "result"}
+"""
+
+from typing import Any, Dict, Optional
+import asyncio
+import uuid
+import orjson
+import structlog
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = structlog.get_logger(__name__)
+
+
+class KafkaMLClient:
+    """
+    Persistent Kafka producer plus a per-worker Redis reply subscription.
+
+    Each request gets a correlation id and a future; the listener task
+    resolves the future when the matching reply arrives.
+    """
+
+    def __init__(self):
+        self.reply_channel = f"ml:replies:{uuid.uuid4().hex}"
+        self._producer = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    @property
+    def running(self) -> bool:
+        """Check if the producer and reply listener are running."""
+        return self._listener is not None and not self._listener.done()
+
+    async def start(self) -> None:
+        """Start the Kafka producer and subscribe to the reply channel."""
+        if not settings.USE_KAFKA_ML or self.running:
+            return
+
+        from aiokafka import AIOKafkaProducer
+
+        self._producer = AIOKafkaProducer(
+            bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
+            linger_ms=1
+        )
+        await self._producer.start()
+
+        client = get_redis()
+        self._pubsub = client.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.reply_channel)
+        self._listener = asyncio.create_task(self._listen())
+        logger.info("Kafka ML client started", reply_channel=self.reply_channel)
+
+    async def stop(self) -> None:
+        """Stop the listener and producer, failing any pending requests."""
+        if not self.running:
+            return
+
+        self._listener.cancel()
+        try:
+            await self._listener
+        except asyncio.CancelledError:
+            pass
+        self._listener = None
+
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+
+        await self._pubsub.unsubscribe(self.reply_channel)
+        await self._pubsub.close()
+        await self._producer.stop()
+        logger.info("Kafka ML client stopped")
+
+    async def predict(self, transaction: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Publish a transaction for scoring and wait for the reply.
+        Raises asyncio.TimeoutError after ML_SERVICE_TIMEOUT seconds, and
+        ValueError if the reply carries no result object.
+        """
+        corr_id = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        self._pending[corr_id] = future
+
+        try:
+            await self._producer.send_and_wait(
+                settings.KAFKA_TOPIC_TRANSACTIONS,
+                orjson.dumps({
+                    "corr_id": corr_id,
+                    "reply_to": self.reply_channel,
+                    "transaction": transaction
+                })
+            )
+            return await asyncio.wait_for(future, settings.ML_SERVICE_TIMEOUT)
+        finally:
+            self._pending.pop(corr_id, None)
+
+    async def _listen(self) -> None:
+        """Resolve pending requests as replies arrive."""
+        try:
+            async for message in self._pubsub.listen():
+                try:
+                    self._resolve(message["data"])
+                except Exception as e:
+                    logger.warning(
+                        "Malformed ML reply",
+                        channel=self.reply_channel,
+                        error=str(e)
+                    )
+        except Exception as e:
+            # Without the listener no reply can arrive; fail the waiters now
+            # instead of leaving them to time out
+            logger.error("ML reply listener stopped", channel=self.reply_channel, error=str(e))
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("ML reply listener stopped"))
+            raise
+
+    def _resolve(self, data: bytes) -> None:
+        """Complete the request a reply belongs to, if it is still waiting."""
+        reply = orjson.loads(data)
+        if not isinstance(reply, dict):
+            raise ValueError("reply is not an object")
+
+        future = self._pending.get(reply.get("corr_id"))
+        if future is None or future.done():
+            return
+
+        result = reply.get("result")
+        if isinstance(result, dict):
+            future.set_result(result)
+        else:
+            future.set_exception(ValueError("ML reply has no result object"))
+
+
+# Global Kafka ML client instance
+kafka_ml_client = KafkaMLClient()
@@ -3,13 +3,51 @@ Structured Logging Configuration
 Production-ready logging with JSON formatting and correlation IDs.
 """
 
+import asyncio
+import atexit
+import io
 import logging
+import re
 import sys
-from typing import Any, Dict
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import orjson
 import structlog
 from structlog.types import EventDict, WrappedLogger
 
 from app.core.config import settings
+from app.core.audit_queue import audit_log_queue
+from app.core.metrics import LOG_QUEUE_DEPTH, LOG_QUEUE_DROPS
+
+
+# Application context merged into every event, built once at import
+_APP_CTX = {
+    "service": "securepay-ai-backend",
+    "version": settings.VERSION,
+    "environment": settings.ENVIRONMENT,
+}
+
+
+def _orjson_dumps(value: Any, default: Any = str, **_: Any) -> str:
+    """JSONRenderer serializer backed by orjson."""
+    return orjson.dumps(value, default=default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _level_gate(
+    logger: WrappedLogger,
+    method_name: str,
+    event_dict: EventDict
+) -> EventDict:
+    """
+    Drop events marked _debug_only=True outside debug mode, before the rest
+    of the processor chain runs.
+    """
+    if event_dict.pop("_debug_only", False) and not settings.DEBUG:
+        raise structlog.DropEvent
+    return event_dict
 
 
 def add_app_context(
@@ -18,35 +56,100 @@ def add_app_context(
     event_dict: EventDict
 ) -> EventDict:
     """Add application context to log events."""
-    event_dict["service"] = "securepay-ai-backend"
-    event_dict["version"] = settings.VERSION
-    event_dict["environment"] = settings.ENVIRONMENT
+    event_dict.update(_APP_CTX)
     return event_dict
 
 
+# Matches any key containing a sensitive word, case-insensitively
+_SENSITIVE_RE = re.compile(
+    r"password|token|secret|key|authorization|credit_card|card_number|cvv|pin|otp",
+    re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=512)
+def _is_sensitive(key: str) -> bool:
+    """Classify a log key once; log keys come from a small fixed vocabulary."""
+    return _SENSITIVE_RE.search(key) is not None
+
+
+def _censor_dict(d: Dict[str, Any]) -> Dict[str, Any]:
+    """Recursively censor sensitive keys in a dict."""
+    return {
+        k: "***CENSORED***" if _is_sensitive(k)
+        else _censor_dict(v) if isinstance(v, dict)
+        else v
+        for k, v in d.items()
+    }
+
+
 def censor_sensitive_data(
     logger: WrappedLogger,
     method_name: str,
     event_dict: EventDict
 ) -> EventDict:
     """Censor sensitive data from logs."""
-    sensitive_keys = [
-        "password", "token", "secret", "key", "authorization",
-        "credit_card", "card_number", "cvv", "pin", "otp"
-    ]
+    if not event_dict:
+        return event_dict
+    return _censor_dict(event_dict)
+
+
+class BufferedPrintLogger:
+    """
+    structlog logger that writes rendered lines into a BufferedWriter on
+    stdout instead of print()ing each one, so a burst of records costs one
+    write() syscall per buffer rather than one per line.
+
+    A daemon thread flushes every flush_ms; the buffer is also flushed when
+    full and at interpreter exit.
+    """
+    
+    def __init__(self, raw: io.RawIOBase, buffer_size: int, flush_ms: int):
+        self._writer = io.BufferedWriter(raw, buffer_size=buffer_size)
+        self._interval = flush_ms / 1000
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+    
+    def msg(self, message: str) -> None:
+        """Buffer one rendered log line."""
+        self._writer.write(message.encode() + b"\n")
+    
+    log = debug = info = warn = warning = msg
+    fatal = failure = err = error = critical = exception = msg
+    
+    def flush(self) -> None:
+        """Write out everything buffered so far."""
+        try:
+            self._writer.flush()
+        except (OSError, ValueError):
+            pass
+    
+    def _flush_loop(self) -> None:
+        """Flush on a fixed interval until the process exits."""
+        while True:
+            time.sleep(self._interval)
+            self.flush()
+
+
+def _stdout_logger_factory():
+    """
+    Logger factory writing to buffered stdout; the audit logger gets a small
+    buffer and a short flush interval so events reach disk quickly.
+    Falls back to print() when stdout has no file descriptor.
+    """
+    try:
+        raw = io.FileIO(sys.stdout.fileno(), "wb", closefd=False)
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return structlog.PrintLoggerFactory()
+    
+    app_output = BufferedPrintLogger(raw, 64 * 1024, settings.LOG_BUFFER_FLUSH_MS)
+    audit_output = BufferedPrintLogger(raw, 4 * 1024, settings.AUDIT_LOG_BUFFER_FLUSH_MS)
     
-    def censor_dict(d: Dict[str, Any]) -> Dict[str, Any]:
-        result = {}
-        for k, v in d.items():
-            if any(sensitive in k.lower() for sensitive in sensitive_keys):
-                result[k] = "***CENSORED***"
-            elif isinstance(v, dict):
-                result[k] = censor_dict(v)
-            else:
-                result[k] = v
-        return result
+    def factory(*args: Any) -> BufferedPrintLogger:
+        return audit_output if args and args[0] == "audit" else app_output
     
-    return censor_dict(event_dict)
+    return factory
 
 
 def setup_logging() -> None:
@@ -57,6 +160,7 @@ def setup_logging() -> None:
     
     # Shared processors for all loggers
     shared_processors = [
+        _level_gate,
         structlog.contextvars.merge_contextvars,
         structlog.processors.add_log_level,
         structlog.processors.TimeStamper(fmt="iso"),
@@ -74,7 +178,7 @@ def setup_logging() -> None:
         # Production: JSON formatting
         processors = shared_processors + [
             structlog.processors.format_exc_info,
-            structlog.processors.JSONRenderer()
+            structlog.processors.JSONRenderer(serializer=_orjson_dumps)
         ]
     
     # Configure structlog
@@ -82,7 +186,7 @@ def setup_logging() -> None:
         processors=processors,
         wrapper_class=structlog.make_filtering_bound_logger(log_level),
         context_class=dict,
-        logger_factory=structlog.PrintLoggerFactory(),
+        logger_factory=_stdout_logger_factory(),
         cache_logger_on_first_use=True,
     )
     
@@ -100,70 +204,86 @@ def setup_logging() -> None:
     )
 
 
-class RequestLogger:
+class AuditLogger:
     """
-    Utility class for logging HTTP requests with context.
+    Audit logger for security-relevant events.
+
+    Once started, events are queued and a single background task writes them
+    through structlog in batches, keeping the log write off the request path.
+    Before start() (and after stop()) events are logged inline. When the
+    queue is full the oldest event is dropped and counted in
+    audit_log_drops_total.
     """
     
-    def __init__(self, request_id: str):
-        self.logger = structlog.get_logger()
-        self.request_id = request_id
+    QUEUE_SIZE = 8192
+    BATCH_MAX = 256
     
-    def log_request(
-        self,
-        method: str,
-        path: str,
-        client_ip: str,
-        user_id: str = None
-    ) -> None:
-        """Log incoming request."""
-        self.logger.info(
-            "Request received",
-            request_id=self.request_id,
-            method=method,
-            path=path,
-            client_ip=client_ip,
-            user_id=user_id
-        )
+    def __init__(self):
+        self.logger = structlog.get_logger("audit")
+        self.dropped = 0
+        self._buffer: Deque[Tuple[str, str, Dict[str, Any]]] = deque(maxlen=self.QUEUE_SIZE)
+        self._ready: Optional[asyncio.Event] = None
+        self._flusher_task: Optional[asyncio.Task] = None
+        self._drops = LOG_QUEUE_DROPS.labels(queue="audit_events")
+        LOG_QUEUE_DEPTH.labels(queue="audit_events").set_function(lambda: len(self._buffer))
     
-    def log_response(
-        self,
-        status_code: int,
-        duration_ms: float
-    ) -> None:
-        """Log response sent."""
-        log_level = "info" if status_code < 400 else "warning" if status_code < 500 else "error"
+    @property
+    def running(self) -> bool:
+        """Check if the flusher task is running."""
+        return self._flusher_task is not None and not self._flusher_task.done()
+    
+    async def start(self) -> None:
+        """Start the background flusher."""
+        if self.running:
+            return
+        self._ready = asyncio.Event()
+        self._flusher_task = asyncio.create_task(self._flush_loop())
+    
+    async def stop(self) -> None:
+        """Stop the flusher and write any events still queued."""
+        if not self.running:
+            return
+        self._flusher_task.cancel()
+        try:
+            await self._flusher_task
+        except asyncio.CancelledError:
+            pass
+        self._flusher_task = None
         
-        getattr(self.logger, log_level)(
-            "Response sent",
-            request_id=self.request_id,
-            status_code=status_code,
-            duration_ms=round(duration_ms, 2)
-        )
+        batch = list(self._buffer)
+        self._buffer.clear()
+        self._write(batch)
+        if self.dropped:
+            self.logger.warning("audit_events_dropped", dropped=self.dropped)
     
-    def log_error(
-        self,
-        error: Exception,
-        context: Dict[str, Any] = None
-    ) -> None:
-        """Log error with context."""
-        self.logger.error(
-            "Error occurred",
-            request_id=self.request_id,
-            error=str(error),
-            error_type=type(error).__name__,
-            context=context or {},
-            exc_info=True
-        )
-
-
-class AuditLogger:
-    """
-    Audit logger for security-relevant events.
-    """
+    def _emit(self, level: str, event: str, **fields: Any) -> None:
+        """Queue an event for the flusher, dropping the oldest one if full."""
+        if not self.running:
+            getattr(self.logger, level)(event, **fields)
+            return
+        
+        if len(self._buffer) == self.QUEUE_SIZE:
+            self.dropped += 1
+            self._drops.inc()
+        self._buffer.append((level, event, fields))
+        self._ready.set()
     
-    def __init__(self):
-        self.logger = structlog.get_logger("audit")
+    def _write(self, batch: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+        """Write a batch of events from the single flusher."""
+        for level, event, fields in batch:
+            getattr(self.logger, level)(event, **fields)
+    
+    async def _flush_loop(self) -> None:
+        """Wait for an event, drain whatever else is queued, write the batch."""
+        buffer = self._buffer
+        while True:
+            await self._ready.wait()
+            batch = [buffer.popleft() for _ in range(min(len(buffer), self.BATCH_MAX))]
+            if not buffer:
+                self._ready.clear()
+            self._write(batch)
+            # Let producers run between batches
+            await asyncio.sleep(0)
     
     def log_authentication(
         self,
@@ -175,7 +295,8 @@ class AuditLogger:
         reason: str = None
     ) -> None:
         """Log authentication attempt."""
-        self.logger.info(
+        self._emit(
+            "info",
             "authentication_attempt",
             event_type="authentication",
             user_id=user_id,
@@ -185,6 +306,16 @@ class AuditLogger:
             user_agent=user_agent,
             reason=reason
         )
+        audit_log_queue.put(
+            event_type="authentication",
+            event_name=method,
+            user_id=user_id,
+            action=method,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            success=success,
+            error_message=reason
+        )
     
     def log_authorization(
         self,
@@ -195,7 +326,8 @@ class AuditLogger:
         reason: str = None
     ) -> None:
         """Log authorization decision."""
-        self.logger.info(
+        self._emit(
+            "info",
             "authorization_check",
             event_type="authorization",
             user_id=user_id,
@@ -214,7 +346,8 @@ class AuditLogger:
         fields_accessed: list = None
     ) -> None:
         """Log data access for compliance."""
-        self.logger.info(
+        self._emit(
+            "info",
             "data_access",
             event_type="data_access",
             user_id=user_id,
@@ -223,6 +356,15 @@ class AuditLogger:
             action=action,
             fields_accessed=fields_accessed or []
         )
+        audit_log_queue.put(
+            event_type="data_access",
+            event_name=action,
+            user_id=user_id,
+            resource_type=resource_type,
+            resource_id=resource_id,
+            action=action,
+            details={"fields_accessed": fields_accessed or []}
+        )
     
     def log_transaction(
         self,
@@ -235,7 +377,8 @@ class AuditLogger:
         decision: str = None
     ) -> None:
         """Log transaction for audit trail."""
-        self.logger.info(
+        self._emit(
+            "info",
             "transaction_event",
             event_type="transaction",
             transaction_id=transaction_id,
@@ -246,6 +389,20 @@ class AuditLogger:
             risk_score=risk_score,
             decision=decision
         )
+        audit_log_queue.put(
+            event_type="transaction",
+            event_name=action,
+            user_id=user_id,
+            resource_type="transaction",
+            resource_id=transaction_id,
+            action=action,
+            details={
+                "amount": amount,
+                "currency": currency,
+                "risk_score": risk_score,
+                "decision": decision
+            }
+        )
     
     def log_security_event(
         self,
@@ -255,8 +412,8 @@ class AuditLogger:
         details: Dict[str, Any] = None
     ) -> None:
         """Log security-relevant event."""
-        log_method = self.logger.warning if severity in ["medium", "high"] else self.logger.info
-        log_method(
+        self._emit(
+            "warning" if severity in ["medium", "high"] else "info",
             "security_event",
             event_type="security",
             event_name=event_name,
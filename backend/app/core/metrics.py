@@ -0,0 +1,18 @@
+"""
+Prometheus Metrics
+Process-wide counters and gauges, served at /metrics.
+"""
+
+from prometheus_client import Counter, Gauge
+
+# Bounded log queues drop their oldest event when full; labelled by queue
+LOG_QUEUE_DROPS = Counter(
+    "audit_log_drops_total",
+    "Log events dropped because the queue was full",
+    ["queue"]
+)
+LOG_QUEUE_DEPTH = Gauge(
+    "audit_log_queue_depth",
+    "Log events waiting to be written",
+    ["queue"]
+)
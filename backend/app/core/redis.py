@@ -3,8 +3,9 @@ Redis Configuration and Utilities
 Async Redis client for caching, rate limiting, and session management.
 """
 
-from typing import Optional, Any
-import json
+from typing import Any, Dict, List, Optional, Tuple
+import orjson
+import time
 import redis.asyncio as redis
 import structlog
 
@@ -16,8 +17,11 @@ logger = structlog.get_logger(__name__)
 redis_pool: Optional[redis.Redis] = None
 
 
-async def get_redis() -> redis.Redis:
-    """Get Redis connection from pool."""
+def init_redis() -> redis.Redis:
+    """
+    Create the Redis connection pool; called once at application startup.
+    Creation never awaits, so on one event loop it cannot race.
+    """
     global redis_pool
     
     if redis_pool is None:
@@ -31,6 +35,13 @@ async def get_redis() -> redis.Redis:
     return redis_pool
 
 
+def get_redis() -> redis.Redis:
+    """Get Redis connection from pool, creating it outside the app (scripts, tests)."""
+    if redis_pool is None:
+        return init_redis()
+    return redis_pool
+
+
 async def close_redis() -> None:
     """Close Redis connection pool."""
     global redis_pool
@@ -42,11 +53,19 @@ async def close_redis() -> None:
 
 
 async def check_redis_connection() -> bool:
-    """Check Redis connectivity."""
+    """
+    Check Redis connectivity over the shared pool; probes never open a
+    client of their own. On a connection error the pool's sockets are
+    dropped so the next probe reconnects cleanly.
+    """
+    client = get_redis()
     try:
-        client = await get_redis()
         await client.ping()
         return True
+    except (redis.ConnectionError, redis.TimeoutError) as e:
+        logger.error("Redis connection check failed", error=str(e))
+        await client.connection_pool.disconnect()
+        return False
     except Exception as e:
         logger.error("Redis connection check failed", error=str(e))
         return False
@@ -54,7 +73,7 @@ async def check_redis_connection() -> bool:
 
 class RedisCache:
     """
-    Redis-based caching utility with JSON serialization.
+    Redis-based caching utility with JSON serialization (orjson).
     """
     
     def __init__(self, prefix: str = "cache"):
@@ -67,16 +86,40 @@ class RedisCache:
     async def get(self, key: str) -> Optional[Any]:
         """Get value from cache."""
         try:
-            client = await get_redis()
+            client = get_redis()
             value = await client.get(self._make_key(key))
             
             if value is not None:
-                return json.loads(value)
+                return orjson.loads(value)
             return None
         except Exception as e:
             logger.error("Cache get error", key=key, error=str(e))
             return None
     
+    async def get_raw(self, key: str) -> Optional[str]:
+        """Get an already serialized value from cache."""
+        try:
+            client = get_redis()
+            return await client.get(self._make_key(key))
+        except Exception as e:
+            logger.error("Cache get error", key=key, error=str(e))
+            return None
+    
+    async def set_raw(
+        self,
+        key: str,
+        value: bytes,
+        expire: int = 300
+    ) -> bool:
+        """Set an already serialized value in cache with expiration."""
+        try:
+            client = get_redis()
+            await client.setex(self._make_key(key), expire, value)
+            return True
+        except Exception as e:
+            logger.error("Cache set error", key=key, error=str(e))
+            return False
+    
     async def set(
         self,
         key: str,
@@ -85,18 +128,49 @@ class RedisCache:
     ) -> bool:
         """Set value in cache with expiration."""
         try:
-            client = await get_redis()
-            serialized = json.dumps(value)
+            client = get_redis()
+            serialized = orjson.dumps(value)
             await client.setex(self._make_key(key), expire, serialized)
             return True
         except Exception as e:
             logger.error("Cache set error", key=key, error=str(e))
             return False
     
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several values in one MGET; missing keys come back as None."""
+        if not keys:
+            return []
+        try:
+            client = get_redis()
+            values = await client.mget([self._make_key(key) for key in keys])
+            return [orjson.loads(value) if value is not None else None for value in values]
+        except Exception as e:
+            logger.error("Cache get_many error", keys=len(keys), error=str(e))
+            return [None] * len(keys)
+    
+    async def set_many(
+        self,
+        items: Dict[str, Any],
+        expire: int = 300
+    ) -> bool:
+        """Set several values with expiration in one pipelined round trip."""
+        if not items:
+            return True
+        try:
+            client = get_redis()
+            async with client.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.setex(self._make_key(key), expire, orjson.dumps(value))
+                await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error("Cache set_many error", keys=len(items), error=str(e))
+            return False
+    
     async def delete(self, key: str) -> bool:
         """Delete value from cache."""
         try:
-            client = await get_redis()
+            client = get_redis()
             await client.delete(self._make_key(key))
             return True
         except Exception as e:
@@ -106,7 +180,7 @@ class RedisCache:
     async def exists(self, key: str) -> bool:
         """Check if key exists in cache."""
         try:
-            client = await get_redis()
+            client = get_redis()
             return await client.exists(self._make_key(key)) > 0
         except Exception as e:
             logger.error("Cache exists error", key=key, error=str(e))
@@ -115,24 +189,80 @@ class RedisCache:
     async def increment(self, key: str, amount: int = 1) -> int:
         """Increment a counter in cache."""
         try:
-            client = await get_redis()
+            client = get_redis()
             return await client.incrby(self._make_key(key), amount)
         except Exception as e:
             logger.error("Cache increment error", key=key, error=str(e))
             return 0
 
 
+# Fixed-window counters, any number of windows in one atomic round trip.
+# Requests already served (e.g. from a local allowance) are always added;
+# the new requests are counted in every window only if all of them are
+# under their limit. A window's key expires with its bucket. Returns a flat
+# {allowed, remaining, ...} per key.
+#   KEYS = one per window (bucket included)
+#   ARGV = cost (new requests), served (requests already served),
+#          then window_seconds, limit per key
+_RATE_LIMIT_LUA = """
+local cost = tonumber(ARGV[1])
+local served = tonumber(ARGV[2])
+local counts = {}
+local all_allowed = true
+for i, key in ipairs(KEYS) do
+    if served > 0 then
+        counts[i] = redis.call('INCRBY', key, served)
+        if counts[i] == served then
+            redis.call('EXPIRE', key, ARGV[2 * i + 1])
+        end
+    else
+        counts[i] = tonumber(redis.call('GET', key) or '0')
+    end
+    if counts[i] >= tonumber(ARGV[2 * i + 2]) then
+        all_allowed = false
+    end
+end
+local result = {}
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[2 * i + 2])
+    local n = counts[i]
+    if all_allowed then
+        if cost > 0 then
+            n = redis.call('INCRBY', key, cost)
+            if n == cost then
+                redis.call('EXPIRE', key, ARGV[2 * i + 1])
+            end
+        end
+        result[2 * i - 1] = 1
+        result[2 * i] = math.max(limit - n, 0)
+    elseif n >= limit then
+        result[2 * i - 1] = 0
+        result[2 * i] = 0
+    else
+        result[2 * i - 1] = 1
+        result[2 * i] = limit - n
+    end
+end
+return result
+"""
+
+
 class RateLimiter:
     """
-    Redis-based rate limiter using sliding window algorithm.
+    Redis-based rate limiter using fixed-window counters.
+    
+    O(1) per window in Redis; a client can burst up to twice the limit
+    across a window boundary, which is acceptable for coarse throttling.
     """
     
     def __init__(self, prefix: str = "ratelimit"):
         self.prefix = prefix
+        self._script = None
     
-    def _make_key(self, identifier: str, window: str) -> str:
-        """Generate rate limit key."""
-        return f"{self.prefix}:{window}:{identifier}"
+    def _make_key(self, identifier: str, window_seconds: int) -> str:
+        """Generate rate limit key for the current window bucket."""
+        bucket = int(time.time()) // window_seconds
+        return f"{self.prefix}:{window_seconds}:{bucket}:{identifier}"
     
     async def is_allowed(
         self,
@@ -144,33 +274,53 @@ class RateLimiter:
         Check if request is allowed under rate limit.
         Returns (is_allowed, remaining_requests).
         """
+        results = await self.is_allowed_multi([(identifier, limit, window_seconds)])
+        return results[0]
+    
+    async def is_allowed_multi(
+        self,
+        checks: List[Tuple[str, int, int]],
+        cost: int = 1,
+        served: int = 0,
+        fail_open: bool = True
+    ) -> List[Tuple[bool, int]]:
+        """
+        Check several (identifier, limit, window_seconds) limits in one round trip.
+        served requests are always counted; cost requests are counted against
+        every window only if all allow it.
+        Returns (is_allowed, remaining_requests) per check, in order; with
+        fail_open=False a Redis error is raised instead of allowing.
+        """
         try:
-            client = await get_redis()
-            key = self._make_key(identifier, str(window_seconds))
+            client = get_redis()
+            keys = [
+                self._make_key(identifier, window_seconds)
+                for identifier, _, window_seconds in checks
+            ]
+            args = [cost, served]
+            for _, limit, window_seconds in checks:
+                args += [window_seconds, limit]
             
-            # Get current count
-            current = await client.get(key)
-            current_count = int(current) if current else 0
-            
-            if current_count >= limit:
-                return False, 0
-            
-            # Increment counter
-            pipe = client.pipeline()
-            pipe.incr(key)
-            
-            if current_count == 0:
-                pipe.expire(key, window_seconds)
+            # Registered once; later calls go out as EVALSHA
+            if self._script is None:
+                self._script = client.register_script(_RATE_LIMIT_LUA)
             
-            await pipe.execute()
+            flat = await self._script(keys=keys, args=args, client=client)
             
-            remaining = limit - current_count - 1
-            return True, remaining
+            return [
+                (bool(flat[i]), flat[i + 1]) for i in range(0, len(flat), 2)
+            ]
             
         except Exception as e:
-            logger.error("Rate limit check error", identifier=identifier, error=str(e))
+            logger.error(
+                "Rate limit check error",
+                identifiers=[identifier for identifier, _, _ in checks],
+                error=str(e)
+            )
+            if not fail_open:
+                raise
             # Fail open - allow request if Redis fails
-            return True, limit
+            return [(True, limit) for _, limit, _ in checks]
     
     async def get_remaining(
         self,
@@ -180,8 +330,8 @@ class RateLimiter:
     ) -> int:
         """Get remaining requests for identifier."""
         try:
-            client = await get_redis()
-            key = self._make_key(identifier, str(window_seconds))
+            client = get_redis()
+            key = self._make_key(identifier, window_seconds)
             
             current = await client.get(key)
             current_count = int(current) if current else 0
@@ -192,6 +342,17 @@ class RateLimiter:
             return limit
 
 
+# Overwrite a session keeping its remaining TTL; 0 if it has already expired
+_SESSION_UPDATE_LUA = """
+local ttl = redis.call('TTL', KEYS[1])
+if ttl < 0 then
+    return 0
+end
+redis.call('SETEX', KEYS[1], ttl, ARGV[1])
+return 1
+"""
+
+
 class SessionStore:
     """
     Redis-based session store for user sessions.
@@ -200,6 +361,7 @@ class SessionStore:
     def __init__(self, prefix: str = "session"):
         self.prefix = prefix
         self.default_ttl = 86400  # 24 hours
+        self._update_script = None
     
     def _make_key(self, session_id: str) -> str:
         """Generate session key."""
@@ -213,9 +375,9 @@ class SessionStore:
     ) -> bool:
         """Create a new session."""
         try:
-            client = await get_redis()
+            client = get_redis()
             key = self._make_key(session_id)
-            serialized = json.dumps(data)
+            serialized = orjson.dumps(data)
             
             await client.setex(key, ttl or self.default_ttl, serialized)
             return True
@@ -226,12 +388,12 @@ class SessionStore:
     async def get(self, session_id: str) -> Optional[dict]:
         """Get session data."""
         try:
-            client = await get_redis()
+            client = get_redis()
             key = self._make_key(session_id)
             
             value = await client.get(key)
             if value:
-                return json.loads(value)
+                return orjson.loads(value)
             return None
         except Exception as e:
             logger.error("Session get error", session_id=session_id, error=str(e))
@@ -240,17 +402,18 @@ class SessionStore:
     async def update(self, session_id: str, data: dict) -> bool:
         """Update session data."""
         try:
-            client = await get_redis()
+            client = get_redis()
             key = self._make_key(session_id)
             
-            # Get current TTL
-            ttl = await client.ttl(key)
-            if ttl < 0:
-                return False
+            # TTL read and rewrite in one atomic call, so an expiring
+            # session can't be resurrected in between
+            if self._update_script is None:
+                self._update_script = client.register_script(_SESSION_UPDATE_LUA)
             
-            serialized = json.dumps(data)
-            await client.setex(key, ttl, serialized)
-            return True
+            result = await self._update_script(
+                keys=[key], args=[orjson.dumps(data)], client=client
+            )
+            return bool(result)
         except Exception as e:
             logger.error("Session update error", session_id=session_id, error=str(e))
             return False
@@ -258,7 +421,7 @@ class SessionStore:
     async def delete(self, session_id: str) -> bool:
         """Delete a session."""
         try:
-            client = await get_redis()
+            client = get_redis()
             key = self._make_key(session_id)
             
             await client.delete(key)
@@ -267,10 +430,46 @@ class SessionStore:
             logger.error("Session delete error", session_id=session_id, error=str(e))
             return False
     
+    def _make_user_key(self, user_id: str) -> str:
+        """Generate cached user key."""
+        return f"{self.prefix}:user:{user_id}"
+    
+    async def get_user_cache(self, user_id: str) -> Optional[dict]:
+        """Get cached user status, role and email."""
+        try:
+            client = get_redis()
+            value = await client.get(self._make_user_key(user_id))
+            if value:
+                return orjson.loads(value)
+            return None
+        except Exception as e:
+            logger.error("User cache get error", user_id=user_id, error=str(e))
+            return None
+    
+    async def set_user_cache(self, user_id: str, data: dict, ttl: int = 60) -> bool:
+        """Cache user status, role and email for token refreshes."""
+        try:
+            client = get_redis()
+            await client.setex(self._make_user_key(user_id), ttl, orjson.dumps(data))
+            return True
+        except Exception as e:
+            logger.error("User cache set error", user_id=user_id, error=str(e))
+            return False
+    
+    async def delete_user_cache(self, user_id: str) -> bool:
+        """Invalidate cached user data."""
+        try:
+            client = get_redis()
+            await client.delete(self._make_user_key(user_id))
+            return True
+        except Exception as e:
+            logger.error("User cache delete error", user_id=user_id, error=str(e))
+            return False
+    
     async def refresh(self, session_id: str, ttl: int = None) -> bool:
         """Refresh session TTL."""
         try:
-            client = await get_redis()
+            client = get_redis()
             key = self._make_key(session_id)
             
             await client.expire(key, ttl or self.default_ttl)
@@ -282,5 +481,6 @@ class SessionStore:
 
 # Create global instances
 cache = RedisCache()
+transaction_cache = RedisCache(prefix="txn")
 rate_limiter = RateLimiter()
 session_store = SessionStore()
@@ -16,53 +16,127 @@ The SecurityHeadersMiddleware adds OWASP-recommended headers automatically.
 """
 
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
 from fastapi import HTTPException, status, Request, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
+import jwt
 from passlib.context import CryptContext
 from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
 from cryptography.fernet import Fernet
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
+from cryptography.hazmat.primitives import hashes, padding, hmac as crypto_hmac
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from functools import lru_cache
 import pyotp
 import hashlib
+import hmac
+import struct
+import time
 import secrets
 import structlog
 import base64
+import os
 
 from app.core.config import settings
 
 logger = structlog.get_logger(__name__)
 
-# Password hashing context
+# Password hashing: Argon2 directly, passlib only for legacy bcrypt hashes
 pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
-argon2_hasher = PasswordHasher()
+argon2_hasher = PasswordHasher(
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST,
+    parallelism=settings.ARGON2_PARALLELISM
+)
+
+# Hash of a random throwaway password, verified against on the unknown-user
+# login path so it costs the same as a real password check
+DUMMY_PASSWORD_HASH = argon2_hasher.hash(secrets.token_urlsafe(32))
 
 # Security bearer scheme
 security = HTTPBearer()
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Middleware to add security headers to all responses."""
+# Security headers, pre-encoded once as raw (lowercase name, value) pairs
+_SEC_HEADERS_RAW = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+    (b"content-security-policy", b"default-src 'self'"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    (b"permissions-policy", b"geolocation=(), microphone=(), camera=()"),
+]
+
+# Dropped from responses: the server header and any value we override
+_SEC_HEADERS_DROP = frozenset([b"server", *(name for name, _ in _SEC_HEADERS_RAW)])
+
+
+class SecurityHeadersMiddleware:
+    """
+    Middleware to add security headers to all responses.
     
-    async def dispatch(self, request: Request, call_next) -> Response:
-        response = await call_next(request)
-        
-        # Security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Content-Security-Policy"] = "default-src 'self'"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
+    Pure ASGI: headers are rewritten on the http.response.start message, so
+    there is no BaseHTTPMiddleware task group or body streaming per request.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Remove server header (use del instead of pop for MutableHeaders)
-        if "Server" in response.headers:
-            del response.headers["Server"]
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Security headers replace any existing values; server header removed
+                message["headers"] = [
+                    header for header in message.get("headers", ())
+                    if header[0] not in _SEC_HEADERS_DROP
+                ] + _SEC_HEADERS_RAW
+            await send(message)
         
-        return response
+        await self.app(scope, receive, send_with_headers)
+
+
+# Character classes a password must contain, as bit flags
+_HAS_UPPER, _HAS_LOWER, _HAS_DIGIT, _HAS_SPECIAL = 1, 2, 4, 8
+_ALL_CLASSES = _HAS_UPPER | _HAS_LOWER | _HAS_DIGIT | _HAS_SPECIAL
+_PASSWORD_SPECIALS = frozenset("!@#$%^&*()_+-=[]{}|;:,.<>?")
+
+_MISSING_CLASS_ISSUES = (
+    (_HAS_UPPER, "Password must contain at least one uppercase letter"),
+    (_HAS_LOWER, "Password must contain at least one lowercase letter"),
+    (_HAS_DIGIT, "Password must contain at least one digit"),
+    (_HAS_SPECIAL, "Password must contain at least one special character"),
+)
+
+
+def password_class_issues(password: str) -> List[str]:
+    """
+    Classify the password in one pass, stopping once every class is seen.
+    Returns a message per missing class (A-Z, a-z, a decimal digit, a
+    special character), in that order; empty when all are present.
+    """
+    seen = 0
+    for c in password:
+        if "A" <= c <= "Z":
+            seen |= _HAS_UPPER
+        elif "a" <= c <= "z":
+            seen |= _HAS_LOWER
+        elif c.isdecimal():
+            seen |= _HAS_DIGIT
+        elif c in _PASSWORD_SPECIALS:
+            seen |= _HAS_SPECIAL
+        else:
+            continue
+        if seen == _ALL_CLASSES:
+            return []
+    
+    return [message for flag, message in _MISSING_CLASS_ISSUES if not seen & flag]
 
 
 class PasswordService:
@@ -71,11 +145,17 @@ class PasswordService:
     @staticmethod
     def hash_password(password: str) -> str:
         """Hash a password using Argon2."""
-        return pwd_context.hash(password)
+        return argon2_hasher.hash(password)
     
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
         """Verify a password against its hash."""
+        if hashed_password.startswith("$argon2"):
+            try:
+                return argon2_hasher.verify(hashed_password, plain_password)
+            except (VerificationError, InvalidHashError):
+                return False
+        # Legacy bcrypt hashes
         return pwd_context.verify(plain_password, hashed_password)
     
     @staticmethod
@@ -88,14 +168,7 @@ class PasswordService:
         
         if len(password) < 12:
             issues.append("Password must be at least 12 characters long")
-        if not any(c.isupper() for c in password):
-            issues.append("Password must contain at least one uppercase letter")
-        if not any(c.islower() for c in password):
-            issues.append("Password must contain at least one lowercase letter")
-        if not any(c.isdigit() for c in password):
-            issues.append("Password must contain at least one digit")
-        if not any(c in "!@#$%^&*()_+-=[]{}|;:,.<>?" for c in password):
-            issues.append("Password must contain at least one special character")
+        issues.extend(password_class_issues(password))
         
         return {
             "valid": len(issues) == 0,
@@ -104,6 +177,19 @@ class PasswordService:
         }
 
 
+# Signing key encoded once rather than on every encode/decode
+_JWT_KEY_BYTES = settings.JWT_SECRET_KEY.encode()
+
+# Token lifetimes in seconds; exp/iat are written as epoch ints
+_ACCESS_EXP_SEC = settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60
+_REFRESH_EXP_SEC = settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS * 86400
+
+
+# Decoded tokens by blake2b digest of the token: (payload, exp), LRU order
+_TOKEN_CACHE: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+_TOKEN_CACHE_SIZE = 4096
+
+
 class JWTService:
     """Service for JWT token generation and validation."""
     
@@ -114,23 +200,22 @@ class JWTService:
     ) -> str:
         """Create a JWT access token."""
         to_encode = data.copy()
+        now = int(time.time())
         
         if expires_delta:
-            expire = datetime.utcnow() + expires_delta
+            expire = now + int(expires_delta.total_seconds())
         else:
-            expire = datetime.utcnow() + timedelta(
-                minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES
-            )
+            expire = now + _ACCESS_EXP_SEC
         
         to_encode.update({
             "exp": expire,
-            "iat": datetime.utcnow(),
+            "iat": now,
             "type": "access"
         })
         
         encoded_jwt = jwt.encode(
             to_encode,
-            settings.JWT_SECRET_KEY,
+            _JWT_KEY_BYTES,
             algorithm=settings.JWT_ALGORITHM
         )
         
@@ -140,18 +225,18 @@ class JWTService:
     def create_refresh_token(data: Dict[str, Any]) -> str:
         """Create a JWT refresh token."""
         to_encode = data.copy()
-        expire = datetime.utcnow() + timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS)
+        now = int(time.time())
         
         to_encode.update({
-            "exp": expire,
-            "iat": datetime.utcnow(),
+            "exp": now + _REFRESH_EXP_SEC,
+            "iat": now,
             "type": "refresh",
             "jti": secrets.token_urlsafe(32)  # Unique token ID
         })
         
         encoded_jwt = jwt.encode(
             to_encode,
-            settings.JWT_SECRET_KEY,
+            _JWT_KEY_BYTES,
             algorithm=settings.JWT_ALGORITHM
         )
         
@@ -159,15 +244,33 @@ class JWTService:
     
     @staticmethod
     def decode_token(token: str) -> Dict[str, Any]:
-        """Decode and validate a JWT token."""
+        """
+        Decode and validate a JWT token.
+        
+        Valid tokens are cached by a digest of the exact token string until
+        their exp, so repeat requests with the same token skip verification.
+        """
+        key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        hit = _TOKEN_CACHE.get(key)
+        if hit is not None:
+            if hit[1] > time.time():
+                _TOKEN_CACHE.move_to_end(key)
+                return hit[0]
+            del _TOKEN_CACHE[key]
+        
         try:
             payload = jwt.decode(
                 token,
-                settings.JWT_SECRET_KEY,
-                algorithms=[settings.JWT_ALGORITHM]
+                _JWT_KEY_BYTES,
+                algorithms=[settings.JWT_ALGORITHM],
+                options={"verify_aud": False}
             )
+            if "exp" in payload:
+                _TOKEN_CACHE[key] = (payload, payload["exp"])
+                if len(_TOKEN_CACHE) > _TOKEN_CACHE_SIZE:
+                    _TOKEN_CACHE.popitem(last=False)
             return payload
-        except JWTError as e:
+        except jwt.PyJWTError as e:
             logger.warning("JWT decode error", error=str(e))
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -181,6 +284,24 @@ class JWTService:
         return payload.get("type") == expected_type
 
 
+TOTP_DIGITS = 6
+TOTP_INTERVAL = 30
+
+
+@lru_cache(maxsize=10_000)
+def _decode_totp_secret(secret: str) -> bytes:
+    """Base32-decode a TOTP secret once per distinct secret."""
+    return base64.b32decode(secret.upper() + "=" * (-len(secret) % 8))
+
+
+def _hotp(key: bytes, counter: int) -> str:
+    """RFC 4226 HOTP value for a counter (HMAC-SHA1, dynamic truncation)."""
+    digest = hmac.new(key, struct.pack(">Q", counter), hashlib.sha1).digest()
+    offset = digest[-1] & 0x0F
+    value = struct.unpack(">I", digest[offset:offset + 4])[0] & 0x7FFFFFFF
+    return str(value % 10 ** TOTP_DIGITS).zfill(TOTP_DIGITS)
+
+
 class MFAService:
     """Service for Multi-Factor Authentication using TOTP."""
     
@@ -201,57 +322,150 @@ class MFAService:
     @staticmethod
     def verify_totp(secret: str, code: str) -> bool:
         """Verify a TOTP code."""
-        totp = pyotp.TOTP(secret)
-        return totp.verify(code, valid_window=settings.MFA_VALID_WINDOW)
+        return MFAService.verify_totp_bytes(_decode_totp_secret(secret), code)
+    
+    @staticmethod
+    def verify_totp_bytes(secret_bytes: bytes, code: str) -> bool:
+        """Verify a TOTP code against an already decoded secret."""
+        # isdigit() alone accepts non-ASCII digits, which compare_digest rejects
+        if not code or len(code) != TOTP_DIGITS or not (code.isascii() and code.isdigit()):
+            return False
+        counter = int(time.time()) // TOTP_INTERVAL
+        window = settings.MFA_VALID_WINDOW
+        return any(
+            hmac.compare_digest(_hotp(secret_bytes, counter + offset), code)
+            for offset in range(-window, window + 1)
+        )
     
     @staticmethod
     def generate_backup_codes(count: int = 10) -> list:
         """Generate backup codes for MFA recovery."""
-        return [secrets.token_hex(4).upper() for _ in range(count)]
+        # One urandom read for all codes, sliced into 4-byte codes
+        raw = secrets.token_bytes(4 * count)
+        return [raw[i:i + 4].hex().upper() for i in range(0, 4 * count, 4)]
+
+
+# Runs of "*" for masking; account and phone numbers are short
+_STAR_CACHE = tuple("*" * i for i in range(64))
+
+
+def _stars(n: int) -> str:
+    """Return n asterisks (empty for n <= 0)."""
+    if n < len(_STAR_CACHE):
+        return _STAR_CACHE[max(n, 0)]
+    return "*" * n
+
+
+# Initialized SHA-256 state copied by EncryptionService.hash_many
+_SHA256_TEMPLATE = hashlib.sha256()
+
+
+@lru_cache(maxsize=32)
+def _fernet_from_key(secret: str) -> Fernet:
+    """Derive a Fernet instance from a secret, once per distinct secret."""
+    key = hashlib.sha256(secret.encode()).digest()
+    return Fernet(base64.urlsafe_b64encode(key))
 
 
 class EncryptionService:
     """Service for data encryption and decryption."""
     
-    def __init__(self):
+    def __init__(self, secret: Optional[str] = None):
         # Derive a valid Fernet key from the encryption key
-        key = hashlib.sha256(settings.ENCRYPTION_KEY.encode()).digest()
-        self.fernet = Fernet(base64.urlsafe_b64encode(key))
+        secret = secret or settings.ENCRYPTION_KEY
+        self.fernet = _fernet_from_key(secret)
+        
+        # Raw Fernet halves for encrypt_many: HMAC signing key, AES key
+        key = hashlib.sha256(secret.encode()).digest()
+        self._encryption_key = key[16:]
+        self._signer = crypto_hmac.HMAC(key[:16], hashes.SHA256())
     
     def encrypt(self, data: str) -> str:
         """Encrypt a string."""
         return self.fernet.encrypt(data.encode()).decode()
     
+    def encrypt_many(self, items: List[str]) -> List[str]:
+        """
+        Encrypt many strings into standard Fernet tokens.
+        
+        Each token gets a fresh IV; the batch shares one timestamp, and the
+        HMAC is copied from a keyed template instead of re-keyed per item.
+        The result decrypts with decrypt() like any other Fernet token.
+        """
+        header = b"\x80" + struct.pack(">Q", int(time.time()))
+        tokens = []
+        for item in items:
+            iv = os.urandom(16)
+            padder = padding.PKCS7(algorithms.AES.block_size).padder()
+            padded = padder.update(item.encode()) + padder.finalize()
+            encryptor = Cipher(algorithms.AES(self._encryption_key), modes.CBC(iv)).encryptor()
+            body = header + iv + encryptor.update(padded) + encryptor.finalize()
+            
+            signer = self._signer.copy()
+            signer.update(body)
+            tokens.append(base64.urlsafe_b64encode(body + signer.finalize()).decode())
+        return tokens
+    
     def decrypt(self, encrypted_data: str) -> str:
         """Decrypt an encrypted string."""
         return self.fernet.decrypt(encrypted_data.encode()).decode()
     
     @staticmethod
     def hash_data(data: str) -> str:
-        """Create a SHA-256 hash of data."""
+        """
+        Create a SHA-256 hash of data.
+        
+        hashlib runs OpenSSL's SHA-256, which uses the CPU's SHA extensions
+        where available. The output format must stay stable: stored account
+        hashes are compared against freshly computed ones.
+        """
         return hashlib.sha256(data.encode()).hexdigest()
     
+    @staticmethod
+    def hash_many(items: List[str]) -> List[str]:
+        """
+        Hash many strings; same digests as hash_data, one per item.
+        Each hasher is copied from an initialized template rather than
+        constructed through the hashlib constructor lookup.
+        """
+        digests = []
+        for item in items:
+            hasher = _SHA256_TEMPLATE.copy()
+            hasher.update(item.encode())
+            digests.append(hasher.hexdigest())
+        return digests
+    
     @staticmethod
     def mask_account_number(account: str) -> str:
         """Mask account number for display (show last 4 digits)."""
-        if len(account) <= 4:
-            return "*" * len(account)
-        return "*" * (len(account) - 4) + account[-4:]
+        n = len(account)
+        if n <= 4:
+            return _stars(n)
+        return _stars(n - 4) + account[-4:]
     
     @staticmethod
     def mask_phone_number(phone: str) -> str:
         """Mask phone number for display."""
-        if len(phone) <= 4:
-            return "*" * len(phone)
-        return phone[:3] + "*" * (len(phone) - 6) + phone[-3:]
+        n = len(phone)
+        if n <= 4:
+            return _stars(n)
+        return phone[:3] + _stars(n - 6) + phone[-3:]
+    
+    @staticmethod
+    def mask_many(accounts: List[str]) -> List[str]:
+        """Mask a list of account numbers for display."""
+        mask = EncryptionService.mask_account_number
+        return [mask(account) for account in accounts]
 
 
 # Dependency for getting current user from token
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> Dict[str, Any]:
     """
     Dependency to extract and validate the current user from JWT token.
+    The user ID is also stored on request.state for the audit middleware.
     """
     token = credentials.credentials
     payload = JWTService.decode_token(token)
@@ -269,6 +483,7 @@ async def get_current_user(
             detail="Invalid token payload"
         )
     
+    request.state.user_id = user_id
     return payload
 
 
@@ -17,20 +17,25 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 import structlog
-import time
 from typing import AsyncGenerator
 
 # Local imports
 from app.core.config import settings
 from app.core.database import init_db, close_db
-from app.core.logging import setup_logging
+from app.core.redis import init_redis, close_redis
+from app.core.logging import setup_logging, audit_logger
+from app.core.audit_queue import audit_log_queue
+from app.core.analytics_rollup import daily_rollup_refresher
+from app.core.http_client import close_http_clients
+from app.core.kafka_ml import kafka_ml_client
 from app.core.security import SecurityHeadersMiddleware
 from app.api.v1 import router as api_v1_router
-from app.middleware.rate_limiter import RateLimitMiddleware
-from app.middleware.audit import AuditMiddleware
+from app.middleware.rate_limiter import RateLimitMiddleware, flush_local_counts
+from app.middleware.audit import AuditMiddleware, request_log_queue
+from app.middleware.health import HealthProbeMiddleware
 
 # Initialize structured logging first
 setup_logging()
@@ -44,11 +49,25 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     logger.info("Starting SecurePay AI Backend Service", version=settings.VERSION)
     await init_db()
     logger.info("Database connection established")
+    init_redis()
+    await audit_logger.start()
+    await request_log_queue.start()
+    await audit_log_queue.start()
+    await daily_rollup_refresher.start()
+    await kafka_ml_client.start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down SecurePay AI Backend Service")
+    await kafka_ml_client.stop()
+    await daily_rollup_refresher.stop()
+    await close_http_clients()
+    await audit_log_queue.stop()
+    await request_log_queue.stop()
+    await audit_logger.stop()
+    await flush_local_counts()
+    await close_redis()
     await close_db()
     logger.info("Database connection closed")
 
@@ -75,16 +94,23 @@ app = FastAPI(
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None,
     openapi_url="/openapi.json" if settings.DEBUG else None,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
+# Middleware added last runs first. Every BaseHTTPMiddleware layer costs a
+# call_next hop per request, so there are as few as possible: audit logging
+# also sets X-Request-ID and X-Process-Time, and security headers are a
+# plain ASGI wrapper that covers every API response. Health probes are
+# routed to their own app by the outermost middleware and skip the rest.
+
 # Security Headers Middleware
 app.add_middleware(SecurityHeadersMiddleware)
 
 # CORS Middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,
+    allow_origins=frozenset(settings.CORS_ORIGINS),  # O(1) origin checks
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH"],
     allow_headers=["*"],
@@ -104,15 +130,8 @@ app.add_middleware(RateLimitMiddleware)
 # Audit Logging Middleware
 app.add_middleware(AuditMiddleware)
 
-
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    """Add processing time header to all responses."""
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = f"{process_time:.4f}"
-    return response
+# Health probes are answered before any other middleware runs
+app.add_middleware(HealthProbeMiddleware)
 
 
 @app.exception_handler(RequestValidationError)
@@ -159,56 +178,6 @@ app.include_router(
 )
 
 
-# Health Check Endpoints
-@app.get("/health", tags=["Health"])
-async def health_check():
-    """
-    Health check endpoint for load balancers and monitoring.
-    Returns service status and version information.
-    """
-    return {
-        "status": "healthy",
-        "service": "securepay-ai-backend",
-        "version": settings.VERSION,
-        "environment": settings.ENVIRONMENT
-    }
-
-
-@app.get("/health/ready", tags=["Health"])
-async def readiness_check():
-    """
-    Readiness probe for Kubernetes.
-    Checks database and Redis connectivity.
-    """
-    from app.core.database import check_db_connection
-    from app.core.redis import check_redis_connection
-    
-    db_status = await check_db_connection()
-    redis_status = await check_redis_connection()
-    
-    is_ready = db_status and redis_status
-    
-    return JSONResponse(
-        status_code=status.HTTP_200_OK if is_ready else status.HTTP_503_SERVICE_UNAVAILABLE,
-        content={
-            "status": "ready" if is_ready else "not_ready",
-            "checks": {
-                "database": "connected" if db_status else "disconnected",
-                "redis": "connected" if redis_status else "disconnected"
-            }
-        }
-    )
-
-
-@app.get("/health/live", tags=["Health"])
-async def liveness_check():
-    """
-    Liveness probe for Kubernetes.
-    Simple check to verify the application is running.
-    """
-    return {"status": "alive"}
-
-
 # Root endpoint
 @app.get("/", tags=["Root"])
 async def root():
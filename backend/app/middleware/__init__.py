@@ -2,5 +2,6 @@
 
 from app.middleware.rate_limiter import RateLimitMiddleware
 from app.middleware.audit import AuditMiddleware
+from app.middleware.health import HealthProbeMiddleware
 
-__all__ = ["RateLimitMiddleware", "AuditMiddleware"]
+__all__ = ["RateLimitMiddleware", "AuditMiddleware", "HealthProbeMiddleware"]
@@ -3,106 +3,284 @@ Audit Logging Middleware
 Comprehensive audit logging for all API requests.
 """
 
+from dataclasses import dataclass
 from fastapi import Request
+from starlette.datastructures import Headers, QueryParams
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
+from secrets import token_hex
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+from collections import deque
+import asyncio
 import structlog
 import time
-import uuid
-import json
+import orjson
+import re
+import sys
 
 from app.core.logging import audit_logger
+from app.core.metrics import LOG_QUEUE_DEPTH, LOG_QUEUE_DROPS
 
 logger = structlog.get_logger(__name__)
 
+# Raw (lowercase bytes) header names whose values are redacted
+SENSITIVE_HEADERS = frozenset((b"authorization", b"cookie", b"x-api-key"))
+
+# Body keys containing any of these words are redacted (access_token and
+# refresh_token are covered by "token")
+_SENSITIVE_RE = re.compile(
+    r"password|token|secret|key|credit_card|cvv|pin|otp",
+    re.IGNORECASE
+)
+
+# Only this much of a request body is kept for logging; larger bodies are
+# logged by size only, without parsing
+MAX_LOGGED_BODY_SIZE = 2048
+
+
+def _sanitize_headers(raw_headers: List[Tuple[bytes, bytes]]) -> dict:
+    """Remove sensitive information from raw ASGI headers."""
+    return {
+        key.decode("latin-1"): "***REDACTED***" if key in SENSITIVE_HEADERS
+        else value.decode("latin-1")
+        for key, value in raw_headers
+    }
+
+
+def _sanitize_body(body: dict) -> dict:
+    """Remove sensitive information from request body."""
+    sanitized = {}
+    for key, value in body.items():
+        if _SENSITIVE_RE.search(key):
+            sanitized[key] = "***REDACTED***"
+        elif isinstance(value, dict):
+            sanitized[key] = _sanitize_body(value)
+        else:
+            sanitized[key] = value
+    
+    return sanitized
+
+
+class _BodyTee:
+    """
+    ASGI receive wrapper that counts request body bytes as the route reads
+    them and keeps the first MAX_LOGGED_BODY_SIZE bytes for the audit log,
+    so the middleware never buffers or replays the body itself.
+    """
+
+    __slots__ = ("_receive", "size", "sample")
+
+    def __init__(self, receive):
+        self._receive = receive
+        self.size = 0
+        self.sample = bytearray()
+
+    async def __call__(self):
+        message = await self._receive()
+        if message["type"] == "http.request":
+            chunk = message.get("body", b"")
+            self.size += len(chunk)
+            room = MAX_LOGGED_BODY_SIZE - len(self.sample)
+            if room > 0:
+                self.sample += chunk[:room]
+        return message
+
+    @property
+    def complete_body(self) -> Optional[bytes]:
+        """The whole body if it fit in the sample, else None."""
+        return bytes(self.sample) if self.size <= MAX_LOGGED_BODY_SIZE else None
+
+
+@dataclass(slots=True)
+class AuditRecord:
+    """
+    One "API request" event, captured with no per-request parsing or
+    sanitizing; the drain task expands it into log fields.
+    """
+    request_id: str
+    method: str
+    path: str
+    query_string: bytes
+    client_ip: str
+    user_agent: Optional[str]
+    raw_headers: List[Tuple[bytes, bytes]]
+    user_id: Optional[str] = None
+    body_size: Optional[int] = None
+    raw_body: Optional[bytes] = None
+
+    def to_fields(self) -> Dict[str, Any]:
+        """Parse, sanitize and flatten the record into log fields."""
+        fields = {
+            "request_id": self.request_id,
+            "method": self.method,
+            "path": self.path,
+            "query_params": dict(QueryParams(self.query_string)),
+            "client_ip": self.client_ip,
+            "user_agent": self.user_agent,
+            "headers": _sanitize_headers(self.raw_headers),
+        }
+        if self.user_id:
+            fields["user_id"] = self.user_id
+        if self.body_size is not None:
+            fields["body_size"] = self.body_size
+        if self.raw_body:
+            try:
+                body_json = orjson.loads(self.raw_body)
+                if isinstance(body_json, dict):
+                    fields["body"] = _sanitize_body(body_json)
+            except orjson.JSONDecodeError:
+                fields["body"] = "non-json"
+        return fields
+
+
+class RequestLogQueue:
+    """
+    Bounded queue of API request/response log events, drained by one
+    background task in batches so logging and sanitization stay off the
+    request path.
+
+    Request events are AuditRecords carrying the raw headers and body; they
+    are sanitized by the drain task just before writing. When the queue is
+    full the oldest event is dropped and counted in audit_log_drops_total.
+    Before start() events are written inline.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 8192,
+        batch_size: int = 512,
+        flush_interval: float = 0.1
+    ):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped_events = 0
+        self._buffer: Deque[Tuple[str, str, Any]] = deque(maxlen=max_size)
+        self._ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._drops = LOG_QUEUE_DROPS.labels(queue="api_requests")
+        LOG_QUEUE_DEPTH.labels(queue="api_requests").set_function(lambda: len(self._buffer))
+
+    @property
+    def running(self) -> bool:
+        """Check if the drain task is running."""
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Start the background drain task."""
+        if self.running:
+            return
+        self._ready = asyncio.Event()
+        self._task = asyncio.create_task(self._drain_loop())
+
+    async def stop(self) -> None:
+        """Stop the drain task and write any events still queued."""
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        batch = list(self._buffer)
+        self._buffer.clear()
+        self._write(batch)
+        if self.dropped_events:
+            logger.warning("API log events dropped", dropped=self.dropped_events)
+
+    def put(self, level: str, event: str, fields: Union[AuditRecord, Dict[str, Any]]) -> None:
+        """Queue a log event; never blocks."""
+        if not self.running:
+            self._write([(level, event, fields)])
+            return
+
+        if len(self._buffer) == self.max_size:
+            self.dropped_events += 1
+            self._drops.inc()
+        self._buffer.append((level, event, fields))
+        self._ready.set()
+
+    def _write(self, batch: List[Tuple[str, str, Union[AuditRecord, Dict[str, Any]]]]) -> None:
+        """Sanitize and write a batch of events."""
+        for level, event, fields in batch:
+            if isinstance(fields, AuditRecord):
+                fields = fields.to_fields()
+            getattr(logger, level)(event, **fields)
+
+    async def _drain_loop(self) -> None:
+        """Collect events into batches of batch_size or flush_interval and write them."""
+        buffer = self._buffer
+        while True:
+            await self._ready.wait()
+            if len(buffer) < self.batch_size:
+                await asyncio.sleep(self.flush_interval)
+
+            # Writing never awaits, so a cancelled drain loses nothing
+            batch = [buffer.popleft() for _ in range(min(len(buffer), self.batch_size))]
+            if not buffer:
+                self._ready.clear()
+            self._write(batch)
+
 
 class AuditMiddleware(BaseHTTPMiddleware):
     """
     Middleware for audit logging of all API requests and responses.
     """
     
-    SENSITIVE_HEADERS = [
-        "authorization",
-        "cookie",
-        "x-api-key"
-    ]
-    
-    EXEMPT_PATHS = [
-        "/health",
-        "/health/ready",
-        "/health/live"
-    ]
-    
     async def dispatch(self, request: Request, call_next):
-        """Log request and response for audit trail."""
+        """Bind a request ID for every log line of the request, then audit it."""
         
-        # Generate request ID
-        request_id = str(uuid.uuid4())
+        # Generate request ID; merge_contextvars adds it to all log events
+        request_id = token_hex(16)
         request.state.request_id = request_id
+        structlog.contextvars.bind_contextvars(request_id=request_id)
+        try:
+            return await self._audit(request, call_next, request_id)
+        finally:
+            structlog.contextvars.unbind_contextvars("request_id")
+    
+    async def _audit(self, request: Request, call_next, request_id: str):
+        """Log request and response for audit trail."""
         
-        # Skip audit for health checks
-        if request.url.path in self.EXEMPT_PATHS:
-            response = await call_next(request)
-            response.headers["X-Request-ID"] = request_id
-            return response
-        
-        # Capture request details
-        start_time = time.time()
-        
-        request_details = {
-            "request_id": request_id,
-            "method": request.method,
-            "path": request.url.path,
-            "query_params": dict(request.query_params),
-            "client_ip": self._get_client_ip(request),
-            "user_agent": request.headers.get("user-agent"),
-            "headers": self._sanitize_headers(dict(request.headers))
-        }
-        
-        # Extract user from token if present
-        user_id = None
-        auth_header = request.headers.get("authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            try:
-                from app.core.security import JWTService
-                token = auth_header.split(" ")[1]
-                payload = JWTService.decode_token(token)
-                user_id = payload.get("sub")
-                request_details["user_id"] = user_id
-            except Exception:
-                pass
+        start_ns = time.perf_counter_ns()
         
-        # Read and cache request body
-        body = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                body = await request.body()
-                request_details["body_size"] = len(body)
-                
-                # Try to parse and sanitize JSON body
-                if body:
-                    try:
-                        body_json = json.loads(body)
-                        request_details["body"] = self._sanitize_body(body_json)
-                    except json.JSONDecodeError:
-                        request_details["body"] = "non-json"
-            except Exception:
-                pass
+        # Capture request details (health probes never reach this middleware).
+        # The drain task runs outside this request's context, so the event
+        # carries request_id itself; headers and body are sanitized there
+        headers = request.headers
+        record = AuditRecord(
+            request_id=request_id,
+            method=sys.intern(request.method),
+            path=request.url.path,
+            query_string=request.scope["query_string"],
+            client_ip=self._get_client_ip(request, headers),
+            user_agent=headers.get("user-agent"),
+            raw_headers=headers.raw
+        )
         
-        logger.info("API request", **request_details)
+        # Observe the body as the route handler reads it
+        body_tee = None
+        if request.method in ("POST", "PUT", "PATCH"):
+            body_tee = request._receive = _BodyTee(request._receive)
         
         # Process request
         try:
-            # Restore body for route handlers
-            if body is not None:
-                async def receive():
-                    return {"type": "http.request", "body": body}
-                request._receive = receive
-            
-            response = await call_next(request)
+            try:
+                response = await call_next(request)
+            finally:
+                # The body has been read and the auth dependency has set
+                # the user by now, so the request event is queued once
+                # call_next returns
+                user_id = record.user_id = getattr(request.state, "user_id", None)
+                if body_tee is not None:
+                    record.body_size = body_tee.size
+                    record.raw_body = body_tee.complete_body
+                request_log_queue.put("info", "API request", record)
             
             # Calculate duration
-            duration_ms = (time.time() - start_time) * 1000
+            duration_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
             
             # Log response
             response_details = {
@@ -116,23 +294,23 @@ class AuditMiddleware(BaseHTTPMiddleware):
             
             # Determine log level based on status code
             if response.status_code < 400:
-                logger.info("API response", **response_details)
+                request_log_queue.put("info", "API response", response_details)
             elif response.status_code < 500:
-                logger.warning("API response (client error)", **response_details)
+                request_log_queue.put("warning", "API response (client error)", response_details)
             else:
-                logger.error("API response (server error)", **response_details)
+                request_log_queue.put("error", "API response (server error)", response_details)
             
-            # Add request ID to response headers
+            # Add request ID and processing time to response headers
             response.headers["X-Request-ID"] = request_id
+            response.headers["X-Process-Time"] = f"{duration_ms / 1000:.4f}"
             
             return response
             
         except Exception as e:
-            duration_ms = (time.time() - start_time) * 1000
+            duration_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
             
             logger.error(
                 "API request failed",
-                request_id=request_id,
                 error=str(e),
                 error_type=type(e).__name__,
                 duration_ms=round(duration_ms, 2),
@@ -141,13 +319,13 @@ class AuditMiddleware(BaseHTTPMiddleware):
             
             raise
     
-    def _get_client_ip(self, request: Request) -> str:
+    def _get_client_ip(self, request: Request, headers: Headers) -> str:
         """Extract client IP address."""
-        forwarded = request.headers.get("X-Forwarded-For")
+        forwarded = headers.get("x-forwarded-for")
         if forwarded:
             return forwarded.split(",")[0].strip()
         
-        real_ip = request.headers.get("X-Real-IP")
+        real_ip = headers.get("x-real-ip")
         if real_ip:
             return real_ip
         
@@ -155,32 +333,7 @@ class AuditMiddleware(BaseHTTPMiddleware):
             return request.client.host
         
         return "unknown"
-    
-    def _sanitize_headers(self, headers: dict) -> dict:
-        """Remove sensitive information from headers."""
-        sanitized = {}
-        for key, value in headers.items():
-            if key.lower() in self.SENSITIVE_HEADERS:
-                sanitized[key] = "***REDACTED***"
-            else:
-                sanitized[key] = value
-        return sanitized
-    
-    def _sanitize_body(self, body: dict) -> dict:
-        """Remove sensitive information from request body."""
-        sensitive_fields = [
-            "password", "token", "secret", "key",
-            "credit_card", "cvv", "pin", "otp",
-            "access_token", "refresh_token"
-        ]
-        
-        sanitized = {}
-        for key, value in body.items():
-            if any(field in key.lower() for field in sensitive_fields):
-                sanitized[key] = "***REDACTED***"
-            elif isinstance(value, dict):
-                sanitized[key] = self._sanitize_body(value)
-            else:
-                sanitized[key] = value
-        
-        return sanitized
+
+
+# Global request log queue instance
+request_log_queue = RequestLogQueue()
@@ -0,0 +1,28 @@
+"""
+Health Probe Middleware
+Routes health probes and metrics scrapes straight to the health app, ahead
+of every other middleware.
+"""
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.api.health import health_app, HEALTH_PATHS
+
+
+class HealthProbeMiddleware:
+    """
+    Outermost middleware that answers /health, /health/ready, /health/live
+    and /metrics from health_app, so probes (fired every few seconds per
+    pod) and scrapes skip audit logging, rate limiting, host and CORS checks.
+    
+    Pure ASGI: one set lookup per request, no call_next hop.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"] in HEALTH_PATHS:
+            await health_app(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
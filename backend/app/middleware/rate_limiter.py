@@ -3,54 +3,207 @@ Rate Limiting Middleware
 Redis-based rate limiting for API endpoints.
 """
 
+import asyncio
+from collections import OrderedDict
+from typing import List, Optional, Tuple
 from fastapi import Request, HTTPException, status
+from starlette.datastructures import Headers
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response, JSONResponse
 import structlog
+import time
 
 from app.core.config import settings
 from app.core.redis import rate_limiter
 
 logger = structlog.get_logger(__name__)
 
+# Per-worker token buckets let clients well under their limit skip Redis.
+# Requests served locally are added to Redis on the next sync, which
+# happens at least every LOCAL_SYNC_INTERVAL seconds per client, or as soon
+# as the local bucket drops to LOCAL_SYNC_THRESHOLD of its capacity.
+# Each sync lets the worker serve at most 1/WORKERS of the client's
+# remaining minute and hour allowance locally, so all workers together
+# stay within both limits between syncs. Counts not yet synced are kept
+# when Redis is unreachable and flushed when a bucket is evicted or the
+# application shuts down.
+LOCAL_BUCKET_MAX_CLIENTS = 10_000
+LOCAL_SYNC_INTERVAL = 1.0
+LOCAL_SYNC_THRESHOLD = 0.2
+
+
+# str() of small remaining counts, built once
+_INT_STR_CACHE = tuple(str(i) for i in range(256))
+
+
+def _int_str(n: int) -> str:
+    """Return str(n), from the cache for small non-negative n."""
+    if 0 <= n < len(_INT_STR_CACHE):
+        return _INT_STR_CACHE[n]
+    return str(n)
+
+
+class _LocalBucket:
+    """Token bucket refilled at the per-minute rate, plus Redis sync state."""
+    
+    __slots__ = (
+        "tokens", "refilled_at", "synced_at", "pending", "allowance",
+        "remaining_minute", "remaining_hour",
+    )
+    
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.refilled_at = now
+        self.synced_at = float("-inf")  # first request always goes to Redis
+        self.pending = 0
+        self.allowance = 0  # requests this worker may serve before the next sync
+        self.remaining_minute = settings.RATE_LIMIT_PER_MINUTE
+        self.remaining_hour = settings.RATE_LIMIT_PER_HOUR
+
+
+_local_buckets: "OrderedDict[str, _LocalBucket]" = OrderedDict()
+
+
+def _take_local_token(
+    client_ip: str,
+    now: float
+) -> Tuple[_LocalBucket, Optional[Tuple[str, _LocalBucket]]]:
+    """
+    Refill the client's bucket and take one token from it if available.
+    Also returns the (client_ip, bucket) evicted to make room, if any.
+    """
+    capacity = settings.RATE_LIMIT_PER_MINUTE
+    evicted = None
+    bucket = _local_buckets.get(client_ip)
+    if bucket is None:
+        bucket = _local_buckets[client_ip] = _LocalBucket(capacity, now)
+        if len(_local_buckets) > LOCAL_BUCKET_MAX_CLIENTS:
+            evicted = _local_buckets.popitem(last=False)
+    else:
+        _local_buckets.move_to_end(client_ip)
+        bucket.tokens = min(capacity, bucket.tokens + (now - bucket.refilled_at) * capacity / 60)
+        bucket.refilled_at = now
+    
+    if bucket.tokens >= 1:
+        bucket.tokens -= 1
+    return bucket, evicted
+
+
+def _redis_checks(client_ip: str) -> List[Tuple[str, int, int]]:
+    """Per-minute and per-hour limits for a client, as rate limiter checks."""
+    return [
+        (f"minute:{client_ip}", settings.RATE_LIMIT_PER_MINUTE, 60),
+        (f"hour:{client_ip}", settings.RATE_LIMIT_PER_HOUR, 3600),
+    ]
+
+
+async def _flush_pending(client_ip: str, bucket: _LocalBucket) -> None:
+    """Add the requests served locally since the last sync to Redis."""
+    if bucket.pending:
+        served = bucket.pending
+        bucket.pending = 0
+        await rate_limiter.is_allowed_multi(_redis_checks(client_ip), cost=0, served=served)
+
+
+async def flush_local_counts() -> None:
+    """Flush every client's unsynced local count to Redis, e.g. on shutdown."""
+    await asyncio.gather(*(
+        _flush_pending(client_ip, bucket)
+        for client_ip, bucket in list(_local_buckets.items())
+        if bucket.pending
+    ))
+
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
     """
     Middleware for rate limiting requests based on IP address.
-    Uses Redis sliding window algorithm.
+    Uses Redis fixed-window counters.
     """
     
-    EXEMPT_PATHS = [
-        "/health",
-        "/health/ready",
-        "/health/live",
+    # Health probes are answered before this middleware runs
+    EXEMPT_PATHS = frozenset({
         "/docs",
         "/redoc",
         "/openapi.json"
-    ]
+    })
+    
+    # Header values that do not change per request, built once
+    _LIMIT_MIN_STR = str(settings.RATE_LIMIT_PER_MINUTE)
+    _LIMIT_HR_STR = str(settings.RATE_LIMIT_PER_HOUR)
+    _MINUTE_EXCEEDED_HEADERS = {
+        "X-RateLimit-Limit": _LIMIT_MIN_STR,
+        "X-RateLimit-Remaining": "0",
+        "X-RateLimit-Reset": "60",
+        "Retry-After": "60"
+    }
+    _HOUR_EXCEEDED_HEADERS = {
+        "X-RateLimit-Limit": _LIMIT_HR_STR,
+        "X-RateLimit-Remaining": "0",
+        "X-RateLimit-Reset": "3600",
+        "Retry-After": "3600"
+    }
     
     async def dispatch(self, request: Request, call_next):
         """Process rate limiting for each request."""
         
+        path = request.url.path
+        
         # Skip rate limiting for exempt paths
-        if request.url.path in self.EXEMPT_PATHS:
+        if path in self.EXEMPT_PATHS:
             return await call_next(request)
         
         # Get client identifier (IP address)
-        client_ip = self._get_client_ip(request)
+        client_ip = self._get_client_ip(request, request.headers)
+        
+        # Obviously allowed: within this worker's share of the remaining
+        # allowance, plenty of local tokens and synced recently
+        now = time.monotonic()
+        bucket, evicted = _take_local_token(client_ip, now)
+        if evicted is not None:
+            await _flush_pending(*evicted)
+        if (
+            bucket.pending < bucket.allowance
+            and bucket.tokens > settings.RATE_LIMIT_PER_MINUTE * LOCAL_SYNC_THRESHOLD
+            and now - bucket.synced_at < LOCAL_SYNC_INTERVAL
+        ):
+            bucket.pending += 1
+            bucket.remaining_minute = max(bucket.remaining_minute - 1, 0)
+            bucket.remaining_hour = max(bucket.remaining_hour - 1, 0)
+            return await self._serve(
+                request, call_next, bucket.remaining_minute, bucket.remaining_hour
+            )
         
-        # Check per-minute rate limit
-        is_allowed_minute, remaining_minute = await rate_limiter.is_allowed(
-            f"minute:{client_ip}",
-            settings.RATE_LIMIT_PER_MINUTE,
-            60
-        )
+        # Check per-minute and per-hour rate limits in one Redis round trip.
+        # Requests served locally since the last sync are counted even when
+        # this one is denied.
+        served = bucket.pending
+        bucket.pending = 0
+        try:
+            (is_allowed_minute, remaining_minute), (is_allowed_hour, remaining_hour) = (
+                await rate_limiter.is_allowed_multi(
+                    _redis_checks(client_ip), served=served, fail_open=False
+                )
+            )
+        except Exception:
+            # Fail open, keeping the unsynced count (this request included)
+            # for the next attempt
+            bucket.pending += served + 1
+            bucket.allowance = 0
+            return await self._serve(
+                request, call_next, bucket.remaining_minute, bucket.remaining_hour
+            )
+        
+        bucket.synced_at = now
+        bucket.remaining_minute = remaining_minute
+        bucket.remaining_hour = remaining_hour
+        # Zero once either limit is reached, so the client keeps asking Redis
+        bucket.allowance = min(remaining_minute, remaining_hour) // settings.WORKERS
         
         if not is_allowed_minute:
             logger.warning(
                 "Rate limit exceeded (per minute)",
                 client_ip=client_ip,
-                path=request.url.path
+                path=path
             )
             return JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
@@ -58,26 +211,14 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                     "detail": "Rate limit exceeded. Please try again later.",
                     "retry_after": 60
                 },
-                headers={
-                    "X-RateLimit-Limit": str(settings.RATE_LIMIT_PER_MINUTE),
-                    "X-RateLimit-Remaining": "0",
-                    "X-RateLimit-Reset": "60",
-                    "Retry-After": "60"
-                }
+                headers=self._MINUTE_EXCEEDED_HEADERS
             )
         
-        # Check per-hour rate limit
-        is_allowed_hour, remaining_hour = await rate_limiter.is_allowed(
-            f"hour:{client_ip}",
-            settings.RATE_LIMIT_PER_HOUR,
-            3600
-        )
-        
         if not is_allowed_hour:
             logger.warning(
                 "Rate limit exceeded (per hour)",
                 client_ip=client_ip,
-                path=request.url.path
+                path=path
             )
             return JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
@@ -85,33 +226,39 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                     "detail": "Hourly rate limit exceeded. Please try again later.",
                     "retry_after": 3600
                 },
-                headers={
-                    "X-RateLimit-Limit": str(settings.RATE_LIMIT_PER_HOUR),
-                    "X-RateLimit-Remaining": "0",
-                    "X-RateLimit-Reset": "3600",
-                    "Retry-After": "3600"
-                }
+                headers=self._HOUR_EXCEEDED_HEADERS
             )
         
-        # Process request
+        return await self._serve(request, call_next, remaining_minute, remaining_hour)
+    
+    async def _serve(
+        self,
+        request: Request,
+        call_next,
+        remaining_minute: int,
+        remaining_hour: int
+    ) -> Response:
+        """Process the request and add rate limit headers."""
         response = await call_next(request)
-        
-        # Add rate limit headers
-        response.headers["X-RateLimit-Limit-Minute"] = str(settings.RATE_LIMIT_PER_MINUTE)
-        response.headers["X-RateLimit-Remaining-Minute"] = str(remaining_minute)
-        response.headers["X-RateLimit-Limit-Hour"] = str(settings.RATE_LIMIT_PER_HOUR)
-        response.headers["X-RateLimit-Remaining-Hour"] = str(remaining_hour)
-        
+        self._add_headers(response, remaining_minute, remaining_hour)
         return response
     
-    def _get_client_ip(self, request: Request) -> str:
+    def _add_headers(self, response: Response, remaining_minute: int, remaining_hour: int) -> None:
+        """Add rate limit headers."""
+        h = response.headers
+        h["X-RateLimit-Limit-Minute"] = self._LIMIT_MIN_STR
+        h["X-RateLimit-Remaining-Minute"] = _int_str(remaining_minute)
+        h["X-RateLimit-Limit-Hour"] = self._LIMIT_HR_STR
+        h["X-RateLimit-Remaining-Hour"] = _int_str(remaining_hour)
+    
+    def _get_client_ip(self, request: Request, headers: Headers) -> str:
         """Extract client IP address from request."""
         # Check for proxy headers
-        forwarded = request.headers.get("X-Forwarded-For")
+        forwarded = headers.get("x-forwarded-for")
         if forwarded:
             return forwarded.split(",")[0].strip()
         
-        real_ip = request.headers.get("X-Real-IP")
+        real_ip = headers.get("x-real-ip")
         if real_ip:
             return real_ip
         
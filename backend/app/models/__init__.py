@@ -3,7 +3,7 @@
 from app.models.user import User, UserRole, UserStatus, APIKey, AuditLog
 from app.models.transaction import (
     Transaction, TransactionType, TransactionStatus,
-    RiskLevel, Alert, TransactionPattern
+    RiskLevel, Alert, TransactionPattern, TransactionDailyRollup
 )
 
 __all__ = [
@@ -17,5 +17,6 @@ __all__ = [
     "TransactionStatus",
     "RiskLevel",
     "Alert",
-    "TransactionPattern"
+    "TransactionPattern",
+    "TransactionDailyRollup"
 ]
@@ -3,15 +3,15 @@ Transaction Model
 SQLAlchemy model for financial transactions and fraud detection.
 """
 
-from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
 from typing import Optional
 from sqlalchemy import (
-    Column, String, Float, Boolean, DateTime, Text, JSON,
-    Integer, ForeignKey, Index, Enum as SQLEnum, Numeric
+    DDL, BigInteger, Column, String, Float, Boolean, Date, DateTime, Text,
+    Integer, ForeignKey, Index, Enum as SQLEnum, Numeric, event, func, text
 )
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID
-import uuid
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 import enum
 
 from app.core.database import Base
@@ -50,27 +50,32 @@ class RiskLevel(str, enum.Enum):
     CRITICAL = "critical"
 
 
+def to_paisa(amount: Decimal) -> int:
+    """Convert a BDT amount to integer paisa (minor units), rounding half up."""
+    return int(Decimal(amount).scaleb(2).to_integral_value(ROUND_HALF_UP))
+
+
 class Transaction(Base):
     """Transaction model for payment processing and fraud detection."""
     
     __tablename__ = "transactions"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    transaction_ref = Column(String(50), unique=True, nullable=False, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    transaction_ref = Column(String(50), nullable=False)
     
-    # Transaction Details
-    amount = Column(Numeric(precision=15, scale=2), nullable=False)
+    # Transaction Details; amount is in paisa, see amount_bdt
+    amount = Column(BigInteger, nullable=False)
     currency = Column(String(3), default="BDT", nullable=False)
     transaction_type = Column(SQLEnum(TransactionType), nullable=False)
     
     # Sender Information
-    sender_account = Column(String(50), nullable=False, index=True)
+    sender_account = Column(String(50), nullable=False)
     sender_name = Column(String(255), nullable=True)
     sender_bank = Column(String(100), nullable=True)
     sender_type = Column(String(50), nullable=True)  # individual, business
     
     # Receiver Information
-    receiver_account = Column(String(50), nullable=False, index=True)
+    receiver_account = Column(String(50), nullable=False)
     receiver_name = Column(String(255), nullable=True)
     receiver_bank = Column(String(100), nullable=True)
     receiver_type = Column(String(50), nullable=True)
@@ -93,7 +98,7 @@ class Transaction(Base):
     # Fraud Detection Results
     risk_score = Column(Float, nullable=True)  # 0.0 to 1.0
     risk_level = Column(SQLEnum(RiskLevel), nullable=True)
-    fraud_flags = Column(JSON, nullable=True)  # List of triggered flags
+    fraud_flags = Column(JSONB, nullable=True)  # List of triggered flags
     ml_model_version = Column(String(50), nullable=True)
     confidence_score = Column(Float, nullable=True)
     
@@ -106,35 +111,87 @@ class Transaction(Base):
     # Additional Data
     description = Column(Text, nullable=True)
     reference_id = Column(String(100), nullable=True)  # External reference
-    metadata_ = Column("metadata", JSON, nullable=True)
+    metadata_ = Column("metadata", JSONB, nullable=True)
     
     # Feature Store (for ML)
-    ml_features = Column(JSON, nullable=True)
+    ml_features = Column(JSONB, nullable=True)
     
-    # Timestamps
-    initiated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Timestamps; initiated_at is the partition key (as in migration 008), so
+    # it is part of the primary key and of every unique index, and the
+    # time-windowed queries that filter on it only scan matching months
+    initiated_at = Column(DateTime, primary_key=True, server_default=func.now(), nullable=False)
     completed_at = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     # Relationships
     reviewer = relationship("User", foreign_keys=[reviewed_by])
-    alerts = relationship("Alert", back_populates="transaction", cascade="all, delete-orphan")
+    alerts = relationship(
+        "Alert",
+        primaryjoin="Transaction.id == foreign(Alert.transaction_id)",
+        back_populates="transaction",
+        cascade="all, delete-orphan"
+    )
     
-    # Indexes for performance
+    # Indexes for performance; the table is range-partitioned by month
     __table_args__ = (
-        Index('idx_transactions_sender', 'sender_account'),
-        Index('idx_transactions_receiver', 'receiver_account'),
-        Index('idx_transactions_status', 'status'),
+        # Unique per partition key only; global uniqueness of transaction_ref
+        # is enforced by the transaction_refs trigger below
+        Index('uq_transactions_ref', 'transaction_ref', 'initiated_at', unique=True),
+        # Pattern and velocity checks look up an account's recent window;
+        # these also serve plain account lookups, and the status prefix
+        # below serves status filters
+        Index('idx_transactions_sender_time', 'sender_account', 'initiated_at'),
+        Index('idx_transactions_receiver_time', 'receiver_account', 'initiated_at'),
         Index('idx_transactions_risk_level', 'risk_level'),
-        Index('idx_transactions_initiated_at', 'initiated_at'),
+        # Review queue: open high-risk transactions, newest first
+        Index(
+            'idx_transactions_high_risk_open',
+            initiated_at.desc(),
+            postgresql_where=(
+                risk_level.in_([RiskLevel.HIGH, RiskLevel.CRITICAL])
+                & status.in_([TransactionStatus.PENDING, TransactionStatus.UNDER_REVIEW])
+            )
+        ),
+        # Dashboard analytics filter on a date range plus risk level or status
+        Index('idx_transactions_initiated_risk', 'initiated_at', 'risk_level'),
+        Index('idx_transactions_initiated_status', 'initiated_at', 'status'),
+        Index(
+            'idx_transactions_initiated_high_risk',
+            'initiated_at',
+            postgresql_where=risk_level.in_([RiskLevel.HIGH, RiskLevel.CRITICAL])
+        ),
+        # Paginated listing filters on status/risk level, newest first
+        Index(
+            'idx_transactions_status_risk_initiated',
+            'status', 'risk_level', initiated_at.desc()
+        ),
         Index('idx_transactions_amount', 'amount'),
         Index('idx_transactions_type_status', 'transaction_type', 'status'),
+        # Rule checks test flag containment: fraud_flags @> '["velocity_spike"]'
+        Index(
+            'idx_transactions_fraud_flags_gin',
+            'fraud_flags',
+            postgresql_using='gin',
+            postgresql_ops={'fraud_flags': 'jsonb_path_ops'}
+        ),
+        Index(
+            'idx_transactions_ml_features_gin',
+            'ml_features',
+            postgresql_using='gin',
+            postgresql_ops={'ml_features': 'jsonb_path_ops'}
+        ),
+        {"postgresql_partition_by": "RANGE (initiated_at)"},
     )
     
     def __repr__(self):
         return f"<Transaction {self.transaction_ref}>"
     
+    @hybrid_property
+    def amount_bdt(self) -> float:
+        """Amount in BDT, for API serialization."""
+        return self.amount / 100
+    
     @property
     def is_high_risk(self) -> bool:
         """Check if transaction is high risk."""
@@ -146,13 +203,91 @@ class Transaction(Base):
         return self.status == TransactionStatus.UNDER_REVIEW
 
 
+# Months of partitions created ahead of the current one, as in migration 008
+PARTITION_MONTHS_AHEAD = 3
+
+# Run after create_all builds the partitioned transactions table; migrations
+# 008 and 013 set up the same objects for migrated databases
+TRANSACTIONS_AFTER_CREATE = (
+    # Creates the monthly partitions covering [from_month, to_month]; safe to
+    # call repeatedly, e.g. from pg_cron, to keep partitions ahead of inserts
+    """
+    CREATE OR REPLACE FUNCTION create_transaction_partitions(from_month date, to_month date)
+    RETURNS void LANGUAGE plpgsql AS $$
+    DECLARE
+        month date := date_trunc('month', from_month);
+    BEGIN
+        WHILE month <= to_month LOOP
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF transactions FOR VALUES FROM (%L) TO (%L)',
+                'transactions_' || to_char(month, 'YYYY_MM'),
+                month,
+                month + interval '1 month'
+            );
+            month := month + interval '1 month';
+        END LOOP;
+    END
+    $$
+    """,
+    "SELECT create_transaction_partitions(now()::date, "
+    f"(now() + interval '{PARTITION_MONTHS_AHEAD} months')::date)",
+    # Catches rows outside the prepared months instead of failing the insert
+    "CREATE TABLE IF NOT EXISTS transactions_default PARTITION OF transactions DEFAULT",
+    # A unique index on a partitioned table must include the partition key,
+    # so each transaction_ref is claimed in this unpartitioned table instead.
+    # Refs stay claimed after their transaction is deleted; drop old months
+    # with drop_transaction_partition() to release their refs as well.
+    "CREATE TABLE IF NOT EXISTS transaction_refs "
+    f"(transaction_ref varchar({Transaction.__table__.c.transaction_ref.type.length}) PRIMARY KEY)",
+    """
+    CREATE OR REPLACE FUNCTION claim_transaction_ref() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO transaction_refs (transaction_ref) VALUES (NEW.transaction_ref);
+        RETURN NULL;
+    END
+    $$
+    """,
+    "CREATE TRIGGER trg_transactions_claim_ref AFTER INSERT ON transactions "
+    "FOR EACH ROW EXECUTE FUNCTION claim_transaction_ref()",
+    """
+    CREATE OR REPLACE FUNCTION drop_transaction_partition(partition_name text)
+    RETURNS void LANGUAGE plpgsql AS $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_inherits
+            WHERE inhrelid = partition_name::regclass
+              AND inhparent = 'transactions'::regclass
+        ) THEN
+            RAISE EXCEPTION '% is not a partition of transactions', partition_name;
+        END IF;
+        EXECUTE format(
+            'DELETE FROM transaction_refs r USING %I t WHERE r.transaction_ref = t.transaction_ref',
+            partition_name
+        );
+        EXECUTE format('DROP TABLE %I', partition_name);
+    END
+    $$
+    """,
+)
+
+# DDL() applies %-formatting to its statement, so literal % signs are doubled
+for _statement in TRANSACTIONS_AFTER_CREATE:
+    event.listen(
+        Transaction.__table__,
+        "after_create",
+        DDL(_statement.replace("%", "%%")).execute_if(dialect="postgresql")
+    )
+
+
 class Alert(Base):
     """Alert model for fraud detection notifications."""
     
     __tablename__ = "alerts"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    transaction_id = Column(UUID(as_uuid=True), ForeignKey("transactions.id"), nullable=False)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    # No foreign key: a partitioned table's unique keys include the partition key
+    transaction_id = Column(UUID(as_uuid=True), nullable=False)
     
     alert_type = Column(String(50), nullable=False)  # fraud, velocity, pattern, etc.
     alert_code = Column(String(20), nullable=False)
@@ -162,8 +297,8 @@ class Alert(Base):
     description = Column(Text, nullable=True)
     
     # Alert details
-    triggered_rules = Column(JSON, nullable=True)
-    evidence = Column(JSON, nullable=True)
+    triggered_rules = Column(JSONB, nullable=True)
+    evidence = Column(JSONB, nullable=True)
     
     # Status
     status = Column(String(20), default="open")  # open, acknowledged, resolved, false_positive
@@ -174,11 +309,15 @@ class Alert(Base):
     resolution_notes = Column(Text, nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     # Relationships
-    transaction = relationship("Transaction", back_populates="alerts")
+    transaction = relationship(
+        "Transaction",
+        primaryjoin="foreign(Alert.transaction_id) == Transaction.id",
+        back_populates="alerts"
+    )
     
     __table_args__ = (
         Index('idx_alerts_transaction_id', 'transaction_id'),
@@ -196,8 +335,8 @@ class TransactionPattern(Base):
     
     __tablename__ = "transaction_patterns"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    account_id = Column(String(50), nullable=False, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
+    account_id = Column(String(50), nullable=False)
     
     # Statistical patterns
     avg_transaction_amount = Column(Float, nullable=True)
@@ -211,16 +350,16 @@ class TransactionPattern(Base):
     avg_monthly_transactions = Column(Float, nullable=True)
     
     # Time patterns
-    typical_hours = Column(JSON, nullable=True)  # List of typical transaction hours
-    typical_days = Column(JSON, nullable=True)  # List of typical transaction days
+    typical_hours = Column(JSONB, nullable=True)  # List of typical transaction hours
+    typical_days = Column(JSONB, nullable=True)  # List of typical transaction days
     
     # Device patterns
-    known_devices = Column(JSON, nullable=True)
-    known_ips = Column(JSON, nullable=True)
-    known_locations = Column(JSON, nullable=True)
+    known_devices = Column(JSONB, nullable=True)
+    known_ips = Column(JSONB, nullable=True)
+    known_locations = Column(JSONB, nullable=True)
     
     # Receiver patterns
-    frequent_receivers = Column(JSON, nullable=True)
+    frequent_receivers = Column(JSONB, nullable=True)
     
     # Risk indicators
     historical_fraud_count = Column(Integer, default=0)
@@ -228,11 +367,11 @@ class TransactionPattern(Base):
     
     # Update tracking
     last_transaction_at = Column(DateTime, nullable=True)
-    pattern_updated_at = Column(DateTime, default=datetime.utcnow)
+    pattern_updated_at = Column(DateTime, server_default=func.now())
     total_transactions = Column(Integer, default=0)
     
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     
     __table_args__ = (
         Index('idx_patterns_account_id', 'account_id'),
@@ -241,3 +380,29 @@ class TransactionPattern(Base):
     
     def __repr__(self):
         return f"<TransactionPattern for {self.account_id}>"
+
+
+class TransactionDailyRollup(Base):
+    """Per-day transaction aggregates backing the analytics dashboard."""
+    
+    __tablename__ = "transactions_daily_rollup"
+    
+    day = Column(Date, primary_key=True)
+    total_count = Column(Integer, default=0, nullable=False)
+    total_amount = Column(Numeric(precision=18, scale=2), default=0, nullable=False)
+    
+    # Counts by risk level
+    risk_low = Column(Integer, default=0, nullable=False)
+    risk_medium = Column(Integer, default=0, nullable=False)
+    risk_high = Column(Integer, default=0, nullable=False)
+    risk_critical = Column(Integer, default=0, nullable=False)
+    
+    # Counts by decision status
+    approved = Column(Integer, default=0, nullable=False)
+    rejected = Column(Integer, default=0, nullable=False)
+    under_review = Column(Integer, default=0, nullable=False)
+    
+    refreshed_at = Column(DateTime, server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<TransactionDailyRollup {self.day}>"
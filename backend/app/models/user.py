@@ -7,14 +7,14 @@ from datetime import datetime
 from typing import List, Optional
 from sqlalchemy import (
     Column, String, Boolean, DateTime, Text, JSON, 
-    Integer, ForeignKey, Index, Enum as SQLEnum
+    Integer, ForeignKey, Index, Enum as SQLEnum, func
 )
 from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID
-import uuid
+from sqlalchemy.dialects.postgresql import ExcludeConstraint, UUID
 import enum
 
 from app.core.database import Base
+from app.core.ids import uuid7
 
 
 class UserRole(str, enum.Enum):
@@ -38,7 +38,7 @@ class User(Base):
     
     __tablename__ = "users"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     email = Column(String(255), unique=True, nullable=False, index=True)
     phone = Column(String(20), unique=True, nullable=True, index=True)
     hashed_password = Column(String(255), nullable=False)
@@ -73,16 +73,23 @@ class User(Base):
     current_session_id = Column(String(64), nullable=True)
     
     # Audit
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     created_by = Column(UUID(as_uuid=True), nullable=True)
     
     # Metadata
     metadata_ = Column("metadata", JSON, nullable=True)
     
     # Relationships
-    api_keys = relationship("APIKey", back_populates="user", cascade="all, delete-orphan")
-    audit_logs = relationship("AuditLog", back_populates="user", cascade="all, delete-orphan")
+    # Never lazy-loaded: an async session cannot emit implicit IO, and an
+    # accidental per-user load would be an N+1. Query sites that need a
+    # collection load it with .options(selectinload(User.api_keys)).
+    api_keys = relationship(
+        "APIKey", back_populates="user", cascade="all, delete-orphan", lazy="raise_on_sql"
+    )
+    audit_logs = relationship(
+        "AuditLog", back_populates="user", cascade="all, delete-orphan", lazy="raise_on_sql"
+    )
     
     # Indexes
     __table_args__ = (
@@ -117,11 +124,11 @@ class APIKey(Base):
     
     __tablename__ = "api_keys"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     
     name = Column(String(100), nullable=False)
-    key_hash = Column(String(255), nullable=False, unique=True)
+    key_hash = Column(String(255), nullable=False)
     key_prefix = Column(String(10), nullable=False)  # First 8 chars for identification
     
     scopes = Column(JSON, nullable=True)  # List of allowed scopes
@@ -130,14 +137,17 @@ class APIKey(Base):
     expires_at = Column(DateTime, nullable=True)
     last_used_at = Column(DateTime, nullable=True)
     
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, server_default=func.now())
     
     # Relationships
-    user = relationship("User", back_populates="api_keys")
+    user = relationship("User", back_populates="api_keys", lazy="raise_on_sql")
     
     __table_args__ = (
         Index('idx_api_keys_user_id', 'user_id'),
-        Index('idx_api_keys_key_hash', 'key_hash'),
+        # key_hash is only looked up by equality; a hash-backed exclusion
+        # constraint keeps it unique with a smaller, faster index than a
+        # B-tree over 64-char digests
+        ExcludeConstraint(('key_hash', '='), name='excl_api_keys_key_hash', using='hash'),
     )
     
     def __repr__(self):
@@ -149,7 +159,7 @@ class AuditLog(Base):
     
     __tablename__ = "audit_logs"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
     
     event_type = Column(String(50), nullable=False)  # login, logout, action, etc.
@@ -170,13 +180,18 @@ class AuditLog(Base):
     success = Column(Boolean, default=True)
     error_message = Column(Text, nullable=True)
     
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
     
     # Relationships
-    user = relationship("User", back_populates="audit_logs")
+    user = relationship("User", back_populates="audit_logs", lazy="raise_on_sql")
     
     __table_args__ = (
-        Index('idx_audit_logs_user_id', 'user_id'),
+        # Recent activity per user, newest first, answered from the index alone
+        Index(
+            'idx_audit_logs_user_time',
+            'user_id', created_at.desc(),
+            postgresql_include=['event_type', 'event_name', 'success']
+        ),
         Index('idx_audit_logs_event_type', 'event_type'),
         Index('idx_audit_logs_created_at', 'created_at'),
         Index('idx_audit_logs_resource', 'resource_type', 'resource_id'),
@@ -4,8 +4,8 @@ Request and Response schemas for transaction processing and fraud detection.
 """
 
 from datetime import datetime
-from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field, validator
+from typing import Annotated, Optional, List, Dict, Any
+from pydantic import AfterValidator, AliasChoices, BaseModel, Field
 from uuid import UUID
 from decimal import Decimal
 from enum import Enum
@@ -40,6 +40,22 @@ class DecisionEnum(str, Enum):
     REVIEW = "REVIEW"
 
 
+def _strip_account_spaces(v: Any) -> Any:
+    """Remove spaces from an account number, without copying when there are none."""
+    if isinstance(v, str) and " " in v:
+        return v.replace(" ", "")
+    return v
+
+
+# Account number: the 5-50 length limits apply to the raw input, then
+# spaces are removed (the order the per-field validator always used)
+AccountStr = Annotated[
+    str,
+    Field(min_length=5, max_length=50),
+    AfterValidator(_strip_account_spaces),
+]
+
+
 # ============== Transaction Analysis Schemas ==============
 
 class TransactionAnalyzeRequest(BaseModel):
@@ -50,12 +66,12 @@ class TransactionAnalyzeRequest(BaseModel):
     transaction_type: TransactionTypeEnum
     
     # Sender details
-    sender_account: str = Field(..., min_length=5, max_length=50)
+    sender_account: AccountStr
     sender_name: Optional[str] = Field(None, max_length=255)
     sender_bank: Optional[str] = Field(None, max_length=100)
     
     # Receiver details
-    receiver_account: str = Field(..., min_length=5, max_length=50)
+    receiver_account: AccountStr
     receiver_name: Optional[str] = Field(None, max_length=255)
     receiver_bank: Optional[str] = Field(None, max_length=100)
     
@@ -73,13 +89,6 @@ class TransactionAnalyzeRequest(BaseModel):
     description: Optional[str] = Field(None, max_length=500)
     reference_id: Optional[str] = Field(None, max_length=100)
     metadata: Optional[Dict[str, Any]] = None
-    
-    @validator("sender_account", "receiver_account")
-    def validate_account(cls, v):
-        """Basic account validation."""
-        # Remove spaces and validate
-        v = v.replace(" ", "")
-        return v
 
 
 class FraudExplanation(BaseModel):
@@ -122,7 +131,8 @@ class TransactionResponse(BaseModel):
     """Schema for transaction response."""
     id: UUID
     transaction_ref: str
-    amount: float
+    # Read from Transaction.amount_bdt; the amount column holds paisa
+    amount: float = Field(validation_alias=AliasChoices("amount_bdt", "amount"))
     currency: str
     transaction_type: str
     sender_account: str  # Will be masked
@@ -248,7 +258,7 @@ class AnalyticsResponse(BaseModel):
 
 class BatchTransactionRequest(BaseModel):
     """Schema for batch transaction analysis."""
-    transactions: List[TransactionAnalyzeRequest] = Field(..., max_items=100)
+    transactions: List[TransactionAnalyzeRequest] = Field(..., max_length=100)
 
 
 class BatchTransactionResponse(BaseModel):
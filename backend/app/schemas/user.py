@@ -7,7 +7,19 @@ from datetime import datetime
 from typing import Optional, List
 from pydantic import BaseModel, EmailStr, Field, validator
 from uuid import UUID
-import re
+
+from app.core.security import password_class_issues
+
+
+def _valid_bd_phone(v: str) -> bool:
+    """Bangladesh mobile number: 01, an operator digit 3-9, then 8 digits."""
+    return (
+        len(v) == 11
+        and v.startswith("01")
+        and "3" <= v[2] <= "9"
+        and v.isascii()
+        and v.isdigit()
+    )
 
 
 # ============== Base Schemas ==============
@@ -17,10 +29,17 @@ class UserBase(BaseModel):
     email: EmailStr
     first_name: str = Field(..., min_length=2, max_length=100)
     last_name: str = Field(..., min_length=2, max_length=100)
-    phone: Optional[str] = Field(None, pattern=r"^01[3-9]\d{8}$")  # Bangladesh phone format
+    phone: Optional[str] = None  # Bangladesh phone format
     organization: Optional[str] = Field(None, max_length=255)
     department: Optional[str] = Field(None, max_length=100)
     job_title: Optional[str] = Field(None, max_length=100)
+    
+    @validator("phone")
+    def validate_bd_phone(cls, v):
+        """Validate Bangladesh phone number format."""
+        if v and not _valid_bd_phone(v):
+            raise ValueError("Invalid Bangladesh phone number format")
+        return v
 
 
 # ============== Registration Schemas ==============
@@ -33,14 +52,9 @@ class UserRegister(UserBase):
     @validator("password")
     def validate_password(cls, v):
         """Validate password strength."""
-        if not re.search(r"[A-Z]", v):
-            raise ValueError("Password must contain at least one uppercase letter")
-        if not re.search(r"[a-z]", v):
-            raise ValueError("Password must contain at least one lowercase letter")
-        if not re.search(r"\d", v):
-            raise ValueError("Password must contain at least one digit")
-        if not re.search(r"[!@#$%^&*()_+\-=\[\]{}|;:,.<>?]", v):
-            raise ValueError("Password must contain at least one special character")
+        issues = password_class_issues(v)
+        if issues:
+            raise ValueError(issues[0])
         return v
     
     @validator("confirm_password")
@@ -49,13 +63,6 @@ class UserRegister(UserBase):
         if "password" in values and v != values["password"]:
             raise ValueError("Passwords do not match")
         return v
-    
-    @validator("phone")
-    def validate_bd_phone(cls, v):
-        """Validate Bangladesh phone number format."""
-        if v and not re.match(r"^01[3-9]\d{8}$", v):
-            raise ValueError("Invalid Bangladesh phone number format")
-        return v
 
 
 class UserCreate(UserBase):
@@ -153,7 +160,7 @@ class UserUpdate(BaseModel):
     
     @validator("phone")
     def validate_bd_phone(cls, v):
-        if v and not re.match(r"^01[3-9]\d{8}$", v):
+        if v and not _valid_bd_phone(v):
             raise ValueError("Invalid Bangladesh phone number format")
         return v
 
@@ -166,14 +173,9 @@ class PasswordChange(BaseModel):
     
     @validator("new_password")
     def validate_password(cls, v):
-        if not re.search(r"[A-Z]", v):
-            raise ValueError("Password must contain at least one uppercase letter")
-        if not re.search(r"[a-z]", v):
-            raise ValueError("Password must contain at least one lowercase letter")
-        if not re.search(r"\d", v):
-            raise ValueError("Password must contain at least one digit")
-        if not re.search(r"[!@#$%^&*()_+\-=\[\]{}|;:,.<>?]", v):
-            raise ValueError("Password must contain at least one special character")
+        issues = password_class_issues(v)
+        if issues:
+            raise ValueError(issues[0])
         return v
     
     @validator("confirm_password")
@@ -0,0 +1,97 @@
+"""
+Analytics Endpoint Tests
+Test cases for the rolling dashboard window over the daily rollup.
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.api.v1.endpoints.analytics import (
+    PERIOD_DAYS, _window_params, get_dashboard_analytics
+)
+
+NOW = datetime(2025, 3, 15, 14, 30)
+
+
+class TestDashboardWindow:
+    """Test how the rolling window is split between rollup and raw rows."""
+
+    @pytest.mark.parametrize("period", list(PERIOD_DAYS))
+    def test_window_is_rolling(self, period):
+        """The window starts exactly one period before now, not at a midnight."""
+        params = _window_params(period, NOW)
+        assert params["start"] == NOW - timedelta(days=PERIOD_DAYS[period])
+        assert params["today_start"] == datetime(2025, 3, 15)
+
+    @pytest.mark.parametrize("period", list(PERIOD_DAYS))
+    def test_parts_cover_window_once(self, period):
+        """Head, whole rollup days and today tile [start, now] without overlap."""
+        params = _window_params(period, NOW)
+        assert params["head_end"] == datetime.combine(params["first_day"], datetime.min.time())
+        assert params["last_day"] == params["today_start"].date() - timedelta(days=1)
+        assert params["start"] <= params["head_end"] <= params["today_start"]
+
+        rollup_days = (params["last_day"] - params["first_day"]).days + 1
+        assert rollup_days == max(PERIOD_DAYS[period] - 1, 0)
+
+    def test_day_period_reads_only_raw_rows(self):
+        """The 24-hour view has no whole day inside it, so the rollup is skipped."""
+        params = _window_params("day", NOW)
+        assert params["first_day"] > params["last_day"]
+        assert params["head_end"] == params["today_start"]
+
+    def test_week_rollup_days(self):
+        """A week ending mid-afternoon uses the six whole days before today."""
+        params = _window_params("week", NOW)
+        assert params["first_day"] == date(2025, 3, 9)
+        assert params["last_day"] == date(2025, 3, 14)
+
+
+class TestDashboardSummary:
+    """Test combining rollup and raw aggregates."""
+
+    @staticmethod
+    def _row(**values):
+        row = MagicMock()
+        row._mapping = values
+        return row
+
+    async def test_rollup_and_raw_rows_are_summed(self, mock_db):
+        """Counts and amounts from both parts of the window are added up."""
+        rollup = self._row(
+            total_count=10, total_amount=Decimal("1000.00"),
+            risk_low=6, risk_medium=2, risk_high=1, risk_critical=1,
+            approved=7, rejected=1, under_review=2
+        )
+        raw = self._row(
+            total_count=2, total_amount=Decimal("200.00"),
+            risk_low=1, risk_medium=0, risk_high=1, risk_critical=0,
+            approved=1, rejected=0, under_review=1
+        )
+        mock_db.execute = AsyncMock(return_value=[rollup, raw])
+
+        response = await get_dashboard_analytics(period="week", current_user={}, db=mock_db)
+
+        summary = response.summary
+        assert summary.total_transactions == 12
+        assert summary.total_amount == 1200.0
+        assert summary.avg_amount == 100.0
+        assert summary.high_risk_count == 3
+        assert summary.review_count == 3
+
+    async def test_empty_window(self, mock_db):
+        """With no rollup rows and no raw rows, everything is zero."""
+        empty = self._row(
+            total_count=None, total_amount=None,
+            risk_low=None, risk_medium=None, risk_high=None, risk_critical=None,
+            approved=None, rejected=None, under_review=None
+        )
+        mock_db.execute = AsyncMock(return_value=[empty, empty])
+
+        response = await get_dashboard_analytics(period="month", current_user={}, db=mock_db)
+
+        assert response.summary.total_transactions == 0
+        assert response.summary.avg_amount == 0.0
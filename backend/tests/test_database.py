@@ -0,0 +1,153 @@
+"""
+Database Helper Tests
+Test cases for the COPY-based bulk writer and the transactions table DDL.
+"""
+
+import pytest
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy import create_mock_engine, inspect
+
+from app.api.v1.endpoints.transactions import _build_records
+from app.core.database import Base, bulk_copy
+from app.models.transaction import Alert, Transaction
+from app.schemas.transaction import TransactionAnalyzeRequest
+
+
+@pytest.fixture
+def copy_session():
+    """Session whose raw asyncpg connection records copy_records_to_table calls."""
+    raw_conn = MagicMock()
+    raw_conn.driver_connection.copy_records_to_table = AsyncMock()
+    conn = MagicMock()
+    conn.get_raw_connection = AsyncMock(return_value=raw_conn)
+    session = MagicMock()
+    session.connection = AsyncMock(return_value=conn)
+    return session, raw_conn.driver_connection.copy_records_to_table
+
+
+def _records(count: int, risk_score: float):
+    """Transactions and alerts built the way batch_analyze builds them."""
+    request = TransactionAnalyzeRequest(
+        transaction_id="TXN-00001",
+        amount="1500.50",
+        transaction_type="p2p",
+        sender_account="01712345678",
+        receiver_account="01898765432",
+    )
+    ml_result = {"risk_score": risk_score, "flags": ["velocity"], "confidence": 0.9}
+    return [_build_records(request, ml_result) for _ in range(count)]
+
+
+def _assert_not_null_columns_filled(model, copy_mock):
+    """Every NOT NULL column sent to COPY carries a value in every record."""
+    table = inspect(model).local_table
+    for call in copy_mock.await_args_list:
+        columns = call.kwargs["columns"]
+        for record in call.kwargs["records"]:
+            assert len(record) == len(columns)
+            for name, value in zip(columns, record):
+                if not table.c[name].nullable:
+                    assert value is not None, f"{model.__tablename__}.{name} sent as NULL"
+
+
+class TestBulkCopy:
+    """Test bulk_copy column selection."""
+
+    async def test_transactions_omit_server_defaults(self, copy_session):
+        """Server-defaulted columns left unset are not sent as NULL."""
+        session, copy_mock = copy_session
+        transactions = [transaction for transaction, _ in _records(3, 0.1)]
+
+        await bulk_copy(session, Transaction, transactions)
+
+        copy_mock.assert_awaited_once()
+        columns = copy_mock.await_args.kwargs["columns"]
+        assert "id" in columns  # assigned client-side by _build_records
+        assert "created_at" not in columns
+        assert "updated_at" not in columns
+        _assert_not_null_columns_filled(Transaction, copy_mock)
+
+    async def test_alerts_omit_generated_id(self, copy_session):
+        """Alert ids and timestamps are left to the database."""
+        session, copy_mock = copy_session
+        alerts = [alert for _, alert in _records(3, 0.95)]
+        assert all(alert is not None for alert in alerts)
+
+        await bulk_copy(session, Alert, alerts)
+
+        copy_mock.assert_awaited_once()
+        columns = copy_mock.await_args.kwargs["columns"]
+        assert "id" not in columns
+        assert "created_at" not in columns
+        assert "transaction_id" in columns
+        _assert_not_null_columns_filled(Alert, copy_mock)
+
+    async def test_mixed_server_default_values_copied_per_group(self, copy_session):
+        """Objects that set a server-defaulted column are copied separately."""
+        session, copy_mock = copy_session
+        alerts = [alert for _, alert in _records(2, 0.95)]
+        alerts[0].id = alerts[0].transaction_id
+
+        await bulk_copy(session, Alert, alerts)
+
+        assert copy_mock.await_count == 2
+        column_sets = [call.kwargs["columns"] for call in copy_mock.await_args_list]
+        assert sum("id" in columns for columns in column_sets) == 1
+        _assert_not_null_columns_filled(Alert, copy_mock)
+
+    async def test_empty_batch_skips_copy(self, copy_session):
+        """Nothing is sent for an empty batch."""
+        session, copy_mock = copy_session
+        await bulk_copy(session, Transaction, [])
+        copy_mock.assert_not_awaited()
+
+
+class TestTransactionPartitioning:
+    """Test the partitioned transactions table built by create_all."""
+
+    @staticmethod
+    def _create_all_statements():
+        """SQL that create_all emits for PostgreSQL."""
+        statements = []
+        engine = create_mock_engine(
+            "postgresql://",
+            lambda sql, *args, **kwargs: statements.append(
+                str(sql.compile(dialect=engine.dialect))
+            )
+        )
+        Base.metadata.create_all(engine, checkfirst=False)
+        return statements
+
+    def test_partition_key_matches_migration(self):
+        """Model and migration 008 partition on the same column."""
+        table = Transaction.__table__
+        migration = Path(__file__).parents[1] / "alembic/versions/008_partition_transactions.py"
+        assert table.dialect_options["postgresql"]["partition_by"] == "RANGE (initiated_at)"
+        assert "PARTITION BY RANGE (initiated_at)" in migration.read_text()
+        assert set(table.primary_key.columns.keys()) == {"id", "initiated_at"}
+
+    def test_create_all_adds_partitions(self):
+        """create_all creates the current and upcoming months and a default."""
+        statements = self._create_all_statements()
+        assert any("PARTITION OF transactions DEFAULT" in sql for sql in statements)
+        assert any(
+            sql.startswith("SELECT create_transaction_partitions(now()::date,")
+            for sql in statements
+        )
+
+    def test_migration_keeps_rows_without_created_at(self):
+        """Migration 008 backfills the partition key instead of filtering rows."""
+        migration = Path(__file__).parents[1] / "alembic/versions/008_partition_transactions.py"
+        source = migration.read_text()
+        assert "COALESCE(created_at, now())" in source
+        assert "WHERE created_at IS NOT NULL" not in source
+
+    def test_create_all_enforces_global_ref_uniqueness(self):
+        """Refs are claimed in an unpartitioned table by an insert trigger."""
+        statements = "\n".join(self._create_all_statements())
+        ref_length = Transaction.__table__.c.transaction_ref.type.length
+        assert f"transaction_refs (transaction_ref varchar({ref_length}) PRIMARY KEY)" in statements
+        assert "AFTER INSERT ON transactions" in statements
+        assert "FUNCTION drop_transaction_partition" in statements
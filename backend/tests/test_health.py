@@ -0,0 +1,69 @@
+"""
+Health Check Tests
+Test cases for the log-drop readiness window.
+"""
+
+from collections import deque
+from unittest.mock import patch
+
+import pytest
+
+from app.api import health
+from app.core.config import settings
+
+WINDOW = settings.AUDIT_LOG_READY_WINDOW_SECONDS
+MAX_DROPS = settings.AUDIT_LOG_READY_MAX_DROPS
+
+
+class _Clock:
+    """Monotonic clock the test moves forward."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def drops():
+    """Drive the dropped-event counters and the clock seen by the readiness check."""
+    from app.middleware.audit import request_log_queue
+
+    clock = _Clock()
+    state = {"dropped": 0}
+
+    def probe(advance: float = 0, dropped: int = 0) -> float:
+        clock.now += advance
+        state["dropped"] += dropped
+        with patch.object(health.audit_log_queue, "dropped", state["dropped"]), \
+                patch.object(health.audit_logger, "dropped", 0), \
+                patch.object(request_log_queue, "dropped_events", 0):
+            return health._log_drops_in_window()
+
+    with patch.object(health.time, "monotonic", clock), \
+            patch.object(health, "_drop_samples", deque([(clock.now, 0)])):
+        yield probe
+
+
+class TestLogDropWindow:
+    """Test that readiness measures drops over a fixed window."""
+
+    def test_frequent_probes_do_not_reset_the_window(self, drops):
+        """Drops spread across several probes still add up within the window."""
+        step = MAX_DROPS // 2 + 1
+        assert drops(advance=1, dropped=step) <= MAX_DROPS
+        # Another caller probing in between does not hide the first drops
+        assert drops(advance=1) <= MAX_DROPS
+        assert drops(advance=1, dropped=step) > MAX_DROPS
+
+    def test_old_drops_leave_the_window(self, drops):
+        """A burst stops failing readiness once it is a full window old."""
+        assert drops(advance=1, dropped=MAX_DROPS + 1) > MAX_DROPS
+        for _ in range(WINDOW):
+            rate = drops(advance=1)
+        assert rate <= MAX_DROPS
+
+    def test_sparse_probes_report_a_rate(self, drops):
+        """Drops over a span longer than the window are scaled to one window."""
+        assert drops(advance=3 * WINDOW, dropped=2 * MAX_DROPS) <= MAX_DROPS
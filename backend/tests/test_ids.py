@@ -0,0 +1,36 @@
+"""
+ID Generation Tests
+Test cases for the UUIDv7 primary key generator.
+"""
+
+import time
+import uuid
+
+from app.core.ids import uuid7
+
+
+class TestUUID7:
+    """Test UUIDv7 generation."""
+
+    def test_version_and_variant(self):
+        """Every id carries version 7 and the RFC 9562 variant."""
+        for _ in range(10000):
+            u = uuid7()
+            assert u.version == 7
+            assert u.variant == uuid.RFC_4122
+
+    def test_timestamp_prefix(self):
+        """The top 48 bits hold the creation time in milliseconds."""
+        before = time.time_ns() // 1_000_000
+        u = uuid7()
+        after = time.time_ns() // 1_000_000
+        assert before <= u.int >> 80 <= after
+
+    def test_ordered_across_milliseconds(self):
+        """Ids generated in later milliseconds sort after earlier ones."""
+        ids = []
+        for _ in range(50):
+            ids.append(uuid7())
+            time.sleep(0.002)
+        assert ids == sorted(ids)
+        assert [str(u) for u in ids] == sorted(str(u) for u in ids)
@@ -0,0 +1,106 @@
+"""
+Kafka ML Client Tests
+Test cases for reply handling and the HTTP fallback in analyze.
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import orjson
+import pytest
+
+from app.api.v1.endpoints.transactions import analyze_transaction
+from app.core.kafka_ml import KafkaMLClient
+from app.schemas.transaction import TransactionAnalyzeRequest
+
+
+class _PubSub:
+    """Reply subscription yielding the given payloads."""
+
+    def __init__(self, payloads):
+        self.payloads = payloads
+
+    async def listen(self):
+        for data in self.payloads:
+            yield {"type": "message", "data": data}
+
+
+def _client():
+    """A client with one pending request, corr_id "c1"; call from a test."""
+    ml = KafkaMLClient()
+    future = asyncio.get_running_loop().create_future()
+    ml._pending["c1"] = future
+    return ml, future
+
+
+class TestReplyListener:
+    """Test that malformed replies neither kill the listener nor hang callers."""
+
+    async def test_valid_reply_resolves_request(self):
+        ml, future = _client()
+        ml._pubsub = _PubSub([orjson.dumps({"corr_id": "c1", "result": {"risk_score": 0.2}})])
+
+        await ml._listen()
+
+        assert future.result() == {"risk_score": 0.2}
+
+    @pytest.mark.parametrize("reply", [{"corr_id": "c1"}, {"corr_id": "c1", "result": [1]}])
+    async def test_reply_without_result_object_fails_request(self, reply):
+        ml, future = _client()
+        ml._pubsub = _PubSub([orjson.dumps(reply)])
+
+        await ml._listen()
+
+        with pytest.raises(ValueError):
+            future.result()
+
+    async def test_listener_survives_malformed_messages(self):
+        """Bad messages are skipped; later replies still resolve."""
+        ml, future = _client()
+        ml._pubsub = _PubSub([
+            b"not json",
+            b"[1, 2]",
+            orjson.dumps({"corr_id": ["unhashable"]}),
+            orjson.dumps({"corr_id": "c1", "result": {"risk_score": 0.2}}),
+        ])
+
+        await ml._listen()
+
+        assert future.result() == {"risk_score": 0.2}
+
+
+class TestAnalyzeFallback:
+    """Test that analyze falls back to HTTP when the Kafka path fails."""
+
+    @pytest.mark.parametrize("error", [asyncio.TimeoutError(), ValueError("no result")])
+    async def test_kafka_failure_uses_http(self, mock_db, sample_transaction_data, error):
+        request = TransactionAnalyzeRequest(
+            transaction_id=sample_transaction_data["transaction_id"],
+            amount=sample_transaction_data["amount"],
+            transaction_type="p2p",
+            sender_account=sample_transaction_data["sender_account"],
+            receiver_account=sample_transaction_data["receiver_account"],
+        )
+        kafka = MagicMock(running=True, predict=AsyncMock(side_effect=error))
+        reply = httpx.Response(
+            200,
+            content=orjson.dumps({
+                "risk_score": 0.1,
+                "confidence": 0.9,
+                "explanation": {"top_factors": []}
+            }),
+            request=httpx.Request("POST", "http://ml/api/v1/ml/predict")
+        )
+        post = AsyncMock(return_value=reply)
+
+        with patch("app.api.v1.endpoints.transactions.kafka_ml_client", kafka), \
+                patch("app.api.v1.endpoints.transactions.ml_client.post", post):
+            response = await analyze_transaction(
+                transaction_data=request,
+                current_user={"sub": "analyst"},
+                db=mock_db
+            )
+
+        post.assert_awaited_once()
+        assert response.decision == "APPROVE"
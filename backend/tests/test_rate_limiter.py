@@ -0,0 +1,115 @@
+"""
+Rate Limiter Tests
+Test cases for the per-worker local buckets in front of the Redis limits.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.middleware import rate_limiter as rl
+from app.middleware.rate_limiter import RateLimitMiddleware, flush_local_counts
+
+CLIENT_IP = "203.0.113.7"
+
+
+def _request() -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/transactions",
+        "headers": [(b"x-real-ip", CLIENT_IP.encode())],
+        "client": ("127.0.0.1", 5000),
+    })
+
+
+async def _call_next(request):
+    return Response("ok")
+
+
+@pytest.fixture
+def middleware():
+    return RateLimitMiddleware(app=MagicMock())
+
+
+@pytest.fixture
+def redis_limiter():
+    """The Redis rate limiter, patched; one allowed check per window by default."""
+    limiter = MagicMock()
+    limiter.is_allowed_multi = AsyncMock(return_value=[(True, 80), (True, 900)])
+    rl._local_buckets.clear()
+    with patch.object(rl, "rate_limiter", limiter):
+        yield limiter
+    rl._local_buckets.clear()
+
+
+def _served(limiter) -> list:
+    """Locally served requests reported with each Redis call."""
+    return [call.kwargs["served"] for call in limiter.is_allowed_multi.await_args_list]
+
+
+class TestLocalBuckets:
+    """Test local serving and syncing with Redis."""
+    
+    async def test_local_share_is_bounded_by_worker_count(self, middleware, redis_limiter):
+        """A worker serves at most remaining // WORKERS requests between syncs."""
+        redis_limiter.is_allowed_multi.return_value = [(True, 2 * settings.WORKERS), (True, 900)]
+        
+        for _ in range(4):
+            response = await middleware.dispatch(_request(), _call_next)
+            assert response.status_code == 200
+        
+        # First request syncs, the next two are local, the fourth syncs
+        assert _served(redis_limiter) == [0, 2]
+    
+    async def test_exhausted_hour_limit_is_not_served_locally(self, middleware, redis_limiter):
+        """With the hour limit used up, every request goes to Redis."""
+        redis_limiter.is_allowed_multi.return_value = [(True, 80), (True, 0)]
+        
+        for _ in range(3):
+            await middleware.dispatch(_request(), _call_next)
+        
+        assert _served(redis_limiter) == [0, 0, 0]
+    
+    async def test_redis_error_keeps_unsynced_count(self, middleware, redis_limiter):
+        """Counts are carried over to the next sync when Redis fails."""
+        redis_limiter.is_allowed_multi.side_effect = [ConnectionError(), [(True, 80), (True, 900)]]
+        
+        first = await middleware.dispatch(_request(), _call_next)
+        await middleware.dispatch(_request(), _call_next)
+        
+        assert first.status_code == 200
+        assert _served(redis_limiter) == [0, 1]
+        assert rl._local_buckets[CLIENT_IP].pending == 0
+    
+    async def test_shutdown_flushes_pending_counts(self, middleware, redis_limiter):
+        """flush_local_counts sends requests served locally to Redis."""
+        for _ in range(3):
+            await middleware.dispatch(_request(), _call_next)
+        
+        await flush_local_counts()
+        
+        assert _served(redis_limiter) == [0, 2]
+        assert redis_limiter.is_allowed_multi.await_args.kwargs["cost"] == 0
+        assert rl._local_buckets[CLIENT_IP].pending == 0
+    
+    async def test_denied_sync_still_counts_served_requests(self, middleware, redis_limiter):
+        """Requests already served are reported even when the sync is denied."""
+        redis_limiter.is_allowed_multi.side_effect = [
+            [(True, 80), (True, 900)],
+            [(False, 0), (True, 850)],
+        ]
+        bucket_ready = await middleware.dispatch(_request(), _call_next)
+        bucket = rl._local_buckets[CLIENT_IP]
+        bucket.pending = 5
+        bucket.synced_at = float("-inf")
+        
+        denied = await middleware.dispatch(_request(), _call_next)
+        
+        assert bucket_ready.status_code == 200
+        assert denied.status_code == 429
+        assert _served(redis_limiter) == [0, 5]
+        assert bucket.pending == 0
@@ -0,0 +1,46 @@
+"""
+Security Service Tests
+Test cases for TOTP verification in the MFA service.
+"""
+
+import pyotp
+import pytest
+
+from app.core.security import MFAService, _decode_totp_secret
+
+
+@pytest.fixture
+def totp_secret():
+    """A fresh base32 TOTP secret."""
+    return pyotp.random_base32()
+
+
+class TestVerifyTOTP:
+    """Test TOTP code verification."""
+
+    def test_current_code_accepted(self, totp_secret):
+        """The code an authenticator shows right now verifies."""
+        code = pyotp.TOTP(totp_secret).now()
+        assert MFAService.verify_totp(totp_secret, code)
+
+    def test_wrong_code_rejected(self, totp_secret):
+        """A code that does not match any step in the window is rejected."""
+        code = pyotp.TOTP(totp_secret).now()
+        wrong = str((int(code) + 500000) % 1000000).zfill(6)
+        assert not MFAService.verify_totp(totp_secret, wrong)
+
+    @pytest.mark.parametrize("code", [
+        None,
+        "",
+        "12345",
+        "1234567",
+        "12345a",
+        " 12345",
+        "١٢٣٤٥٦",  # Arabic-Indic digits
+        "１２３４５６",  # fullwidth digits
+        "12345٦",
+    ])
+    def test_malformed_code_rejected(self, totp_secret, code):
+        """Malformed codes, including non-ASCII digits, return False without raising."""
+        secret_bytes = _decode_totp_secret(totp_secret)
+        assert MFAService.verify_totp_bytes(secret_bytes, code) is False
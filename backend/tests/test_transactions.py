@@ -0,0 +1,170 @@
+"""
+Transaction Endpoint Tests
+Test cases for batch analysis against a stubbed ML service and for
+account number validation.
+"""
+
+import httpx
+import orjson
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from unittest.mock import AsyncMock, patch
+
+from app.api.v1.endpoints.transactions import batch_analyze
+from app.schemas.transaction import (
+    BatchTransactionRequest,
+    TransactionAnalyzeRequest,
+    TransactionCreate,
+)
+
+ML_URL = "http://ml/api/v1/ml/predict_batch"
+
+
+@pytest.fixture
+def batch_request(sample_transaction_data):
+    """A batch of three valid analyze requests."""
+    item = {
+        "transaction_id": sample_transaction_data["transaction_id"],
+        "amount": sample_transaction_data["amount"],
+        "transaction_type": "p2p",
+        "sender_account": sample_transaction_data["sender_account"],
+        "receiver_account": sample_transaction_data["receiver_account"],
+    }
+    return BatchTransactionRequest(transactions=[item] * 3)
+
+
+def _ml_reply(status_code: int = 200, body=None, content: bytes = None) -> httpx.Response:
+    """An ML service response to the batch prediction call."""
+    if content is None:
+        content = orjson.dumps(body)
+    return httpx.Response(status_code, content=content, request=httpx.Request("POST", ML_URL))
+
+
+def _predictions(count: int) -> dict:
+    return {"predictions": [{"risk_score": 0.1, "confidence": 0.9}] * count}
+
+
+async def _run(batch_request, mock_db, *, reply=None, error=None):
+    """Call batch_analyze with the ML client stubbed."""
+    post = AsyncMock(return_value=reply, side_effect=error)
+    with patch("app.api.v1.endpoints.transactions.ml_client.post", post):
+        return await batch_analyze(
+            batch_request=batch_request,
+            current_user={"sub": "analyst"},
+            db=mock_db
+        )
+
+
+class TestBatchAnalyze:
+    """Test batch analysis against ML service failures."""
+
+    async def test_full_reply_commits_every_transaction(self, batch_request, mock_db):
+        """Each transaction is scored and written."""
+        response = await _run(batch_request, mock_db, reply=_ml_reply(body=_predictions(3)))
+
+        assert response.total_processed == 3
+        assert response.total_approved == 3
+        mock_db.commit.assert_awaited_once()
+
+    @pytest.mark.parametrize("count", [0, 2, 4])
+    async def test_prediction_count_mismatch_fails_batch(self, batch_request, mock_db, count):
+        """A short or long reply fails the batch instead of dropping rows."""
+        with pytest.raises(HTTPException) as exc_info:
+            await _run(batch_request, mock_db, reply=_ml_reply(body=_predictions(count)))
+
+        assert exc_info.value.status_code == 502
+        mock_db.commit.assert_not_awaited()
+
+    @pytest.mark.parametrize("reply", [
+        _ml_reply(content=b"<html>bad gateway</html>"),
+        _ml_reply(body={"results": []}),
+        _ml_reply(body={"predictions": None}),
+        _ml_reply(body={"predictions": [{"confidence": 0.9}] * 3}),
+    ])
+    async def test_malformed_reply_returns_502(self, batch_request, mock_db, reply):
+        """Unparseable or incomplete bodies are reported as a bad gateway."""
+        with pytest.raises(HTTPException) as exc_info:
+            await _run(batch_request, mock_db, reply=reply)
+
+        assert exc_info.value.status_code == 502
+        mock_db.commit.assert_not_awaited()
+
+    async def test_ml_error_status_returns_503(self, batch_request, mock_db):
+        """An ML 5xx is reported as service unavailable."""
+        with pytest.raises(HTTPException) as exc_info:
+            await _run(batch_request, mock_db, reply=_ml_reply(500, body={"detail": "boom"}))
+
+        assert exc_info.value.status_code == 503
+
+    async def test_connection_error_returns_503(self, batch_request, mock_db):
+        """An unreachable ML service is reported as service unavailable."""
+        with pytest.raises(HTTPException) as exc_info:
+            await _run(batch_request, mock_db, error=httpx.ConnectError("refused"))
+
+        assert exc_info.value.status_code == 503
+
+    async def test_timeout_returns_504(self, batch_request, mock_db):
+        """A slow ML service is reported as a gateway timeout."""
+        with pytest.raises(HTTPException) as exc_info:
+            await _run(batch_request, mock_db, error=httpx.ReadTimeout("slow"))
+
+        assert exc_info.value.status_code == 504
+
+
+def _analyze(sample_transaction_data, **accounts) -> TransactionAnalyzeRequest:
+    data = {
+        "transaction_id": sample_transaction_data["transaction_id"],
+        "amount": sample_transaction_data["amount"],
+        "transaction_type": "p2p",
+        "sender_account": sample_transaction_data["sender_account"],
+        "receiver_account": sample_transaction_data["receiver_account"],
+    }
+    data.update(accounts)
+    return TransactionAnalyzeRequest(**data)
+
+
+class TestAccountNumbers:
+    """Account number handling on the transaction schemas."""
+    
+    def test_spaces_are_removed(self, sample_transaction_data):
+        """Spaces inside an account number are stripped."""
+        request = _analyze(sample_transaction_data, sender_account="0171 234 5678")
+        
+        assert request.sender_account == "01712345678"
+    
+    def test_length_limits_apply_before_stripping(self, sample_transaction_data):
+        """The 5-50 limits are checked against the value as sent."""
+        request = _analyze(sample_transaction_data, sender_account="1 2 3")
+        assert request.sender_account == "123"
+        
+        with pytest.raises(ValidationError):
+            _analyze(sample_transaction_data, receiver_account="1234" + " " * 47)
+    
+    def test_length_limits(self, sample_transaction_data):
+        """Too short or too long account numbers are rejected."""
+        with pytest.raises(ValidationError):
+            _analyze(sample_transaction_data, sender_account="1234")
+        with pytest.raises(ValidationError):
+            _analyze(sample_transaction_data, sender_account="1" * 51)
+    
+    def test_batch_items_use_analyze_rules(self, batch_request):
+        """Batch items are validated like single analyze requests."""
+        item = batch_request.transactions[0].model_dump()
+        item["sender_account"] = "0171 234 5678"
+        
+        batch = BatchTransactionRequest(transactions=[item])
+        
+        assert batch.transactions[0].sender_account == "01712345678"
+    
+    def test_create_is_unconstrained(self):
+        """TransactionCreate keeps account numbers as given."""
+        transaction = TransactionCreate(
+            amount=100,
+            transaction_type="p2p",
+            sender_account="12 3",
+            receiver_account="1",
+        )
+        
+        assert transaction.sender_account == "12 3"
+        assert transaction.receiver_account == "1"
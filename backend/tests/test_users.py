@@ -0,0 +1,142 @@
+"""
+User Management Tests
+Test cases for admin user updates and the token-refresh user cache.
+"""
+
+import uuid
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.endpoints.auth import refresh_token
+from app.api.v1.endpoints.users import update_user
+from app.core.security import JWTService
+from app.models.user import User, UserRole, UserStatus
+from app.schemas.user import RefreshTokenRequest, UserAdminUpdate
+
+ADMIN = {"sub": "admin-id", "roles": ["admin"]}
+
+
+@pytest.fixture
+def user():
+    """An active analyst as loaded from the database."""
+    return User(
+        id=uuid.uuid4(),
+        email="analyst@example.com",
+        hashed_password="x",
+        first_name="Test",
+        last_name="Analyst",
+        role=UserRole.ANALYST,
+        status=UserStatus.ACTIVE,
+        mfa_enabled=False,
+        created_at=datetime.utcnow()
+    )
+
+
+@pytest.fixture
+def user_db(mock_db, user):
+    """Session whose lookups return the user fixture."""
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = user
+    mock_db.execute = AsyncMock(return_value=result)
+    return mock_db
+
+
+@pytest.fixture
+def user_cache():
+    """session_store user-cache methods, patched where the endpoints use them."""
+    store = MagicMock()
+    store.get_user_cache = AsyncMock(return_value=None)
+    store.set_user_cache = AsyncMock(return_value=True)
+    store.delete_user_cache = AsyncMock(return_value=True)
+    with patch("app.api.v1.endpoints.users.session_store", store), \
+            patch("app.api.v1.endpoints.auth.session_store", store):
+        yield store
+
+
+class TestAdminUserUpdate:
+    """Test the admin user update endpoint."""
+
+    @pytest.mark.parametrize("changes", [
+        {"status": "suspended"},
+        {"status": "inactive"},
+        {"role": "viewer"},
+        {"role": "admin", "force_password_change": True},
+    ])
+    async def test_status_or_role_change_invalidates_cache(
+        self, user, user_db, user_cache, changes
+    ):
+        """Changing status or role drops the cached entry token refresh reads."""
+        response = await update_user(
+            user_id=user.id,
+            user_update=UserAdminUpdate(**changes),
+            current_user=ADMIN,
+            db=user_db
+        )
+
+        user_db.commit.assert_awaited_once()
+        user_cache.delete_user_cache.assert_awaited_once_with(str(user.id))
+        for field, value in changes.items():
+            assert getattr(user, field) == value
+        assert (response.role, response.status) == (user.role.value, user.status.value)
+
+    async def test_other_fields_keep_cache(self, user, user_db, user_cache):
+        """Flags that refresh does not read leave the cache alone."""
+        await update_user(
+            user_id=user.id,
+            user_update=UserAdminUpdate(force_password_change=True),
+            current_user=ADMIN,
+            db=user_db
+        )
+
+        assert user.force_password_change is True
+        user_cache.delete_user_cache.assert_not_awaited()
+
+    async def test_unknown_status_rejected(self, user, user_db, user_cache):
+        """Values outside the enums are rejected before anything is written."""
+        with pytest.raises(HTTPException) as exc_info:
+            await update_user(
+                user_id=user.id,
+                user_update=UserAdminUpdate(status="deleted"),
+                current_user=ADMIN,
+                db=user_db
+            )
+
+        assert exc_info.value.status_code == 422
+        user_db.commit.assert_not_awaited()
+        user_cache.delete_user_cache.assert_not_awaited()
+
+
+class TestRefreshUserCache:
+    """Test that token refresh honours status changes."""
+
+    @staticmethod
+    def _refresh_request(user) -> RefreshTokenRequest:
+        token = JWTService.create_refresh_token({"sub": str(user.id)})
+        return RefreshTokenRequest(refresh_token=token)
+
+    async def test_suspended_user_cannot_refresh_after_update(self, user, user_db, user_cache):
+        """Once the admin update drops the cache, refresh reads the new status."""
+        cached = {"status": "active", "role": "analyst", "email": user.email}
+        user_cache.get_user_cache.return_value = cached
+        response = await refresh_token(self._refresh_request(user), db=user_db)
+        assert response.access_token
+
+        await update_user(
+            user_id=user.id,
+            user_update=UserAdminUpdate(status="suspended"),
+            current_user=ADMIN,
+            db=user_db
+        )
+        # The real store returns a miss once the entry is deleted
+        user_cache.get_user_cache.return_value = None
+
+        with pytest.raises(HTTPException) as exc_info:
+            await refresh_token(self._refresh_request(user), db=user_db)
+
+        assert exc_info.value.status_code == 401
+        user_cache.set_user_cache.assert_awaited_with(
+            str(user.id), {"status": "suspended", "role": "analyst", "email": user.email}
+        )
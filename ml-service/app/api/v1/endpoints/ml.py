@@ -6,6 +6,7 @@ Fraud prediction and model management endpoints.
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
 from typing import Dict, Any, List
+import asyncio
 import structlog
 
 from app.services.model_loader import model_manager
@@ -39,6 +40,16 @@ class PredictionResponse(BaseModel):
     explanation: Dict[str, Any]
 
 
+class BatchPredictionRequest(BaseModel):
+    """Batch fraud prediction request schema."""
+    transactions: List[PredictionRequest]
+
+
+class BatchPredictionResponse(BaseModel):
+    """Batch fraud prediction response schema, in request order."""
+    predictions: List[PredictionResponse]
+
+
 @router.post("/predict", response_model=PredictionResponse)
 async def predict_fraud(request: PredictionRequest):
     """
@@ -74,6 +85,38 @@ async def predict_fraud(request: PredictionRequest):
         )
 
 
+@router.post("/predict_batch", response_model=BatchPredictionResponse)
+async def predict_fraud_batch(request: BatchPredictionRequest):
+    """
+    Predict fraud probability for a batch of transactions in one call.
+    
+    Predictions are returned in the same order as the request.
+    """
+    
+    try:
+        results = await asyncio.gather(
+            *(model_manager.predict(txn.dict()) for txn in request.transactions)
+        )
+        
+        logger.info("Batch fraud prediction completed", batch_size=len(results))
+        
+        return BatchPredictionResponse(
+            predictions=[PredictionResponse(**result) for result in results]
+        )
+        
+    except Exception as e:
+        logger.error(
+            "Batch prediction failed",
+            batch_size=len(request.transactions),
+            error=str(e),
+            exc_info=True
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Prediction failed: {str(e)}"
+        )
+
+
 @router.get("/models")
 async def list_models():
     """List loaded models and their status."""